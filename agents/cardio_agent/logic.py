@@ -18,15 +18,12 @@ async def close_tools():
 
 
 async def build_cardio_plan(query: str, weight: float, context: Dict[str, Any]) -> Dict[str, Any]:
-    estimate = await mcp_client.call(
-        "progress_tracker",
-        "estimate_progress",
-        {"goal": query, "weeks": 8, "weight": weight},
-    )
-    adjustment = await mcp_client.call(
-        "progress_tracker",
-        "adjust_plan",
-        {"fatigue_level": "moderate"},
+    estimate, adjustment = await mcp_client.call_many(
+        [
+            ("progress_tracker", "estimate_progress", {"goal": query, "weeks": 8, "weight": weight}),
+            ("progress_tracker", "adjust_plan", {"fatigue_level": "moderate"}),
+        ],
+        return_exceptions=False,
     )
     plan: Dict[str, Any] = {
         "weekly_cardio": "3 sessions: intervals, zone2, long run",
@@ -44,6 +41,8 @@ async def build_cardio_plan(query: str, weight: float, context: Dict[str, Any])
                 muscle_card["url"],
                 {"query": "strength base for runners", "weight": weight, "context": {"skip_collab": True}},
                 muscle_card.get("query_endpoint", "/query"),
+                capability="strength-training",
+                exclude_name="cardio_agent",
             )
             plan["strength_base"] = base.get("plan", {})
 
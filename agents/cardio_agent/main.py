@@ -1,14 +1,28 @@
+import os
 from typing import Any, Dict
 
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
 
-from agents.cardio_agent.logic import build_cardio_plan, close_tools, init_tools
-from agents.common import deregister_self, register_self
+from agents.cardio_agent.logic import build_cardio_plan, close_tools, init_tools, mcp_client
+from agents.common import (
+    DeadlineExceeded,
+    card_cache,
+    close_http_client,
+    deadline_scope,
+    deregister_self,
+    register_self,
+    runtime_stats,
+    start_heartbeat,
+    start_http_client,
+)
+from telemetry.metrics import install_metrics
+from telemetry.tracing import TracingMiddleware, start_tracing, stop_tracing
 
 AGENT_NAME = "cardio_agent"
-AGENT_URL = "http://localhost:8003"
+AGENT_URL = os.getenv("AGENT_URL", "http://localhost:8003")
+INSTANCE_NAME = os.getenv("AGENT_INSTANCE_NAME", AGENT_NAME)
 CAPABILITIES = ["cardio-endurance", "running-plan"]
 MCP_TOOLS = ["estimate_progress", "adjust_plan"]
 AGENT_CARD = {
@@ -31,6 +45,8 @@ AGENT_CARD = {
 }
 
 app = FastAPI(title="Cardio Agent")
+app.add_middleware(TracingMiddleware, service=INSTANCE_NAME)
+install_metrics(app)
 
 
 class QueryRequest(BaseModel):
@@ -41,20 +57,28 @@ class QueryRequest(BaseModel):
 
 @app.on_event("startup")
 async def startup():
+    start_tracing(INSTANCE_NAME)
+    await start_http_client()
     await init_tools()
-    await register_self(AGENT_NAME, AGENT_URL, CAPABILITIES, MCP_TOOLS, AGENT_CARD)
+    await register_self(INSTANCE_NAME, AGENT_URL, CAPABILITIES, MCP_TOOLS, AGENT_CARD)
+    start_heartbeat(INSTANCE_NAME)
+    card_cache.start_watch()
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    await card_cache.stop_watch()
     await close_tools()
-    await deregister_self(AGENT_NAME)
+    await deregister_self(INSTANCE_NAME)
+    await close_http_client()
+    await stop_tracing()
 
 
 @app.post("/query")
 async def query(req: QueryRequest):
     try:
-        plan = await build_cardio_plan(req.query, req.weight, req.context)
+        with deadline_scope(req.context.get("timeout_ms")):
+            plan = await build_cardio_plan(req.query, req.weight, req.context)
         return {
             "summary": "Cardio plan generated",
             "plan": plan,
@@ -62,6 +86,8 @@ async def query(req: QueryRequest):
             "collaborators_used": ["muscle_agent"] if "strength_base" in plan else [],
             "tools_used": ["estimate_progress", "adjust_plan"],
         }
+    except DeadlineExceeded as e:
+        raise HTTPException(504, str(e))
     except Exception as e:
         raise HTTPException(500, str(e))
 
@@ -71,6 +97,11 @@ async def health():
     return {"status": "healthy", "capabilities": CAPABILITIES}
 
 
+@app.get("/stats")
+async def stats():
+    return {**runtime_stats(), "mcp": mcp_client.stats()}
+
+
 @app.get("/agent-card")
 async def agent_card():
     return AGENT_CARD
@@ -1,38 +1,612 @@
+import asyncio
+import importlib.util
+import json
 import os
-from contextlib import AsyncExitStack
-from typing import Any, Dict, Optional
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import (
+    Any,
+    AsyncContextManager,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+)
 
 import httpx
 from mcp import ClientSession
 from mcp.client.stdio import StdioServerParameters, stdio_client
 
+from telemetry.metrics import counter, default_registry, histogram
+from telemetry.tracing import span, trace_headers
+
 
 def registry_url() -> str:
     return os.getenv("REGISTRY_URL", "http://localhost:8000").rstrip("/")
 
 
+class DeadlineExceeded(Exception):
+    pass
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("a2a_deadline", default=None)
+
+
+def remaining_budget() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(timeout_ms: Optional[float]):
+    """Bound the current request by ``timeout_ms``; nested scopes only ever shrink it."""
+    deadline = _deadline.get()
+    if timeout_ms is not None:
+        candidate = time.monotonic() + float(timeout_ms) / 1000.0
+        if deadline is None or candidate < deadline:
+            deadline = candidate
+    token = _deadline.set(deadline)
+    try:
+        check_deadline()
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def check_deadline():
+    remaining = remaining_budget()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def hop_timeout(default: float) -> float:
+    check_deadline()
+    remaining = remaining_budget()
+    return default if remaining is None else min(default, remaining)
+
+
+def with_deadline(payload: Dict[str, Any]) -> Dict[str, Any]:
+    remaining = remaining_budget()
+    if remaining is None:
+        return payload
+    context = {**(payload.get("context") or {}), "timeout_ms": max(int(remaining * 1000), 0)}
+    return {**payload, "context": context}
+
+
+async def within_deadline(awaitable: Awaitable[Any]) -> Any:
+    remaining = remaining_budget()
+    if remaining is None:
+        return await awaitable
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Request deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Request deadline exceeded") from None
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    def __init__(self, limits: httpx.Limits, max_per_host: Optional[int] = None):
+        self._transport = httpx.AsyncHTTPTransport(limits=limits)
+        self._max_per_host = max_per_host
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._waiting = 0
+        self._requests = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _slot(self, request: httpx.Request) -> Optional[asyncio.Semaphore]:
+        if not self._max_per_host:
+            return None
+        host = f"{request.url.scheme}://{request.url.host}:{request.url.port}"
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self._max_per_host)
+            self._host_slots[host] = slot
+        return slot
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        acquired: Optional[float] = None
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            nonlocal acquired
+            if acquired is None:
+                acquired = time.perf_counter()
+                self._waiting -= 1
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        slot = self._slot(request)
+        self._waiting += 1
+        try:
+            if slot is not None:
+                await slot.acquire()
+            try:
+                response = await self._transport.handle_async_request(request)
+            except BaseException:
+                if slot is not None:
+                    slot.release()
+                raise
+        finally:
+            if acquired is None:
+                acquired = time.perf_counter()
+                self._waiting -= 1
+            self._record_wait(acquired - started)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, slot),
+            extensions=response.extensions,
+        )
+
+    def _record_wait(self, seconds: float):
+        self._requests += 1
+        self._wait_total += seconds
+        self._wait_max = max(self._wait_max, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        connections = getattr(self._transport, "_pool").connections
+        idle = sum(1 for conn in connections if conn.is_idle())
+        closed = sum(1 for conn in connections if conn.is_closed())
+        return {
+            "connections": len(connections),
+            "in_use": len(connections) - idle - closed,
+            "idle": idle,
+            "waiting": self._waiting,
+            "requests": self._requests,
+            "avg_wait_ms": round(1000 * self._wait_total / self._requests, 3) if self._requests else 0.0,
+            "max_wait_ms": round(1000 * self._wait_max, 3),
+        }
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, slot: Optional[asyncio.Semaphore]):
+        self._stream = stream
+        self._slot = slot
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._slot is not None:
+                self._slot.release()
+                self._slot = None
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_transport: Optional[PooledTransport] = None
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value) or None
+
+
+async def start_http_client(
+    mounts: Optional[Dict[str, httpx.AsyncBaseTransport]] = None,
+) -> httpx.AsyncClient:
+    global _http_client, _http_transport
+    if _http_client is not None:
+        return _http_client
+    limits = httpx.Limits(
+        max_connections=_env_int("HTTP_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_int("HTTP_MAX_KEEPALIVE", 20),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    _http_transport = PooledTransport(limits, _env_int("HTTP_MAX_CONNECTIONS_PER_HOST", None))
+    _http_client = httpx.AsyncClient(transport=_http_transport, mounts=mounts, timeout=20.0)
+    return _http_client
+
+
+def http_client() -> httpx.AsyncClient:
+    if _http_client is None:
+        raise RuntimeError("HTTP client not started; call start_http_client() on startup")
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client, _http_transport
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _http_transport = None
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    if _http_transport is None:
+        return {"started": False}
+    return {"started": True, **_http_transport.stats()}
+
+
+class TTLCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: float):
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+
+@asynccontextmanager
+async def stdio_session(script_path: str):
+    params = StdioServerParameters(command="python", args=[os.path.abspath(script_path)])
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            yield session
+
+
+_inprocess_servers: Dict[str, Any] = {}
+
+
+def load_inprocess_server(script_path: str) -> Any:
+    path = os.path.abspath(script_path)
+    server = _inprocess_servers.get(path)
+    if server is None:
+        module_name = "_mcp_inprocess_" + os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        server = _inprocess_servers[path] = module.mcp
+    return server
+
+
+@asynccontextmanager
+async def inprocess_session(script_path: str):
+    from fastmcp.client.transports import FastMCPTransport
+
+    async with FastMCPTransport(load_inprocess_server(script_path)).connect_session() as session:
+        yield session
+
+
+MCP_TRANSPORTS: Dict[str, Callable[[str], AsyncContextManager[ClientSession]]] = {
+    "stdio": stdio_session,
+    "inprocess": inprocess_session,
+}
+
+
+def mcp_transport(name: str) -> str:
+    return os.getenv(f"MCP_TRANSPORT_{name.upper()}", os.getenv("MCP_TRANSPORT", "stdio"))
+
+
+class MCPSessionWorker:
+    def __init__(self, open_session: Callable[[], AsyncContextManager[ClientSession]]):
+        self.open_session = open_session
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.calls = 0
+        self.last_used = time.monotonic()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        await ready
+
+    async def _run(self, ready: asyncio.Future):
+        try:
+            async with self.open_session() as session:
+                await session.initialize()
+                self.session = session
+                # Idle time counts from when the worker can take calls, not from before startup.
+                self.last_used = time.monotonic()
+                ready.set_result(None)
+                await self._closing.wait()
+        except Exception as exc:
+            if not ready.done():
+                ready.set_exception(exc)
+        finally:
+            self.session = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and not self._closing.is_set()
+
+    async def call(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        self.in_flight += 1
+        self.calls += 1
+        try:
+            return await self.session.call_tool(tool_name, args)
+        finally:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+
+    async def close(self):
+        self._closing.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class MCPSessionPool:
+    def __init__(
+        self,
+        open_session: Callable[[], AsyncContextManager[ClientSession]],
+        transport: str,
+        min_size: int,
+        max_size: int,
+        grow_at: int,
+        idle_timeout: float,
+    ):
+        self.open_session = open_session
+        self.transport = transport
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.grow_at = max(1, grow_at)
+        self.idle_timeout = idle_timeout
+        self.workers: List[MCPSessionWorker] = []
+        self._growing: Optional[asyncio.Task] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self._closers: List[asyncio.Task] = []
+
+    async def start(self):
+        for _ in range(self.min_size):
+            await self._add_worker()
+        if self.max_size > self.min_size:
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    async def list_tools(self) -> List[Any]:
+        worker = await self.acquire()
+        result = await worker.session.list_tools()
+        return result.tools
+
+    async def _add_worker(self) -> MCPSessionWorker:
+        worker = MCPSessionWorker(self.open_session)
+        await worker.start()
+        self.workers.append(worker)
+        return worker
+
+    def _grow(self) -> asyncio.Task:
+        if self._growing is None:
+            self._growing = asyncio.create_task(self._add_worker())
+            self._growing.add_done_callback(self._grown)
+        return self._growing
+
+    def _grown(self, task: asyncio.Task):
+        self._growing = None
+        if not task.cancelled():
+            task.exception()
+
+    async def acquire(self) -> MCPSessionWorker:
+        self.workers = [w for w in self.workers if w.alive]
+        if not self.workers:
+            return await asyncio.shield(self._grow())
+        worker = min(self.workers, key=lambda w: w.in_flight)
+        if worker.in_flight >= self.grow_at and len(self.workers) < self.max_size:
+            self._grow()
+        return worker
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 0.1))
+            self._reap()
+
+    def _reap(self):
+        if len(self.workers) <= self.min_size:
+            return
+        now = time.monotonic()
+        for worker in list(self.workers):
+            if len(self.workers) <= self.min_size:
+                break
+            if worker.in_flight == 0 and now - worker.last_used > self.idle_timeout:
+                self.workers.remove(worker)
+                closer = asyncio.create_task(worker.close())
+                self._closers.append(closer)
+                closer.add_done_callback(self._closers.remove)
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+        if self._growing is not None:
+            self._growing.cancel()
+        workers, self.workers = self.workers, []
+        reaper = [self._reaper] if self._reaper is not None else []
+        await asyncio.gather(
+            *(w.close() for w in workers), *self._closers, *reaper, return_exceptions=True
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "transport": self.transport,
+            "size": len(self.workers),
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "in_flight": [w.in_flight for w in self.workers],
+            "calls": [w.calls for w in self.workers],
+        }
+
+
+MCP_CALL_LATENCY = histogram(
+    "mcp_tool_call_duration_seconds",
+    "Round-trip time of MCP tool calls that reached the server.",
+    ("server", "tool"),
+)
+MCP_CALL_ERRORS = counter(
+    "mcp_tool_errors_total",
+    "MCP tool calls that raised or returned is_error.",
+    ("server", "tool"),
+)
+MCP_CACHE_HITS = counter(
+    "mcp_tool_cache_hits_total",
+    "MCP tool calls answered from the result cache.",
+    ("server", "tool"),
+)
+
+
 class MCPToolClient:
-    def __init__(self):
-        self._stack = AsyncExitStack()
-        self._sessions: Dict[str, ClientSession] = {}
+    def __init__(
+        self,
+        min_sessions: Optional[int] = None,
+        max_sessions: Optional[int] = None,
+        grow_at: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        result_cache_size: Optional[int] = None,
+    ):
+        self.min_sessions = min_sessions or int(os.getenv("MCP_POOL_MIN_SESSIONS", "1"))
+        self.max_sessions = max_sessions or int(os.getenv("MCP_POOL_MAX_SESSIONS", "4"))
+        self.grow_at = grow_at or int(os.getenv("MCP_POOL_GROW_AT", "2"))
+        self.idle_timeout = (
+            idle_timeout
+            if idle_timeout is not None
+            else float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "60"))
+        )
+        self._pools: Dict[str, MCPSessionPool] = {}
+        self._cache_ttls: Dict[str, Dict[str, float]] = {}
+        self._results = TTLCache(
+            result_cache_size
+            if result_cache_size is not None
+            else int(os.getenv("MCP_TOOL_CACHE_SIZE", "1024"))
+        )
+        self._cache_counts: Dict[str, Dict[str, int]] = {}
 
-    async def connect(self, name: str, script_path: str):
-        if name in self._sessions:
+    async def connect(
+        self,
+        name: str,
+        script_path: str,
+        min_sessions: Optional[int] = None,
+        max_sessions: Optional[int] = None,
+        transport: Optional[str] = None,
+    ):
+        if name in self._pools:
             return
-        params = StdioServerParameters(command="python", args=[os.path.abspath(script_path)])
-        read, write = await self._stack.enter_async_context(stdio_client(params))
-        session = await self._stack.enter_async_context(ClientSession(read, write))
-        await session.initialize()
-        self._sessions[name] = session
+        transport = transport or mcp_transport(name)
+        if transport not in MCP_TRANSPORTS:
+            raise ValueError(f"Unknown MCP transport for {name}: {transport}")
+        if transport == "inprocess":
+            min_sessions = max_sessions = 1
+        open_session = MCP_TRANSPORTS[transport]
+        pool = MCPSessionPool(
+            lambda: open_session(script_path),
+            transport,
+            min_size=min_sessions or self.min_sessions,
+            max_size=max_sessions or self.max_sessions,
+            grow_at=self.grow_at,
+            idle_timeout=self.idle_timeout,
+        )
+        await pool.start()
+        self._pools[name] = pool
+        self._cache_ttls[name] = {
+            tool.name: float(tool.meta["cache_ttl"])
+            for tool in await pool.list_tools()
+            if tool.meta and tool.meta.get("cache_ttl")
+        }
 
     async def call(self, server_name: str, tool_name: str, args: Dict[str, Any]) -> str:
-        session = self._sessions[server_name]
-        result = await session.call_tool(tool_name, args)
-        return content_to_text(result)
+        with span("mcp.call", kind="client", server=server_name, tool=tool_name) as tool_span:
+            ttl = self._cache_ttls.get(server_name, {}).get(tool_name)
+            if ttl:
+                key = (server_name, tool_name, json.dumps(args, sort_keys=True, default=str))
+                counts = self._cache_counts.setdefault(
+                    f"{server_name}.{tool_name}", {"hits": 0, "misses": 0}
+                )
+                cached = self._results.get(key)
+                if cached is not None:
+                    counts["hits"] += 1
+                    MCP_CACHE_HITS.inc((server_name, tool_name))
+                    tool_span.set("cache", "hit")
+                    return cached
+                counts["misses"] += 1
+
+            labels = (server_name, tool_name)
+            pool = self._pools[server_name]
+            worker = await within_deadline(pool.acquire())
+            started = time.perf_counter()
+            try:
+                result = await within_deadline(worker.call(tool_name, args))
+            except Exception:
+                MCP_CALL_ERRORS.inc(labels)
+                raise
+            finally:
+                MCP_CALL_LATENCY.observe(time.perf_counter() - started, labels)
+            text = content_to_text(result)
+            if getattr(result, "is_error", False):
+                MCP_CALL_ERRORS.inc(labels)
+                tool_span.status = "error"
+            elif ttl:
+                self._results.put(key, text, ttl)
+            return text
+
+    async def call_many(
+        self,
+        calls: List[Tuple[str, str, Dict[str, Any]]],
+        max_concurrency: Optional[int] = None,
+        return_exceptions: bool = True,
+    ) -> List[Any]:
+        slots = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+        async def run(server_name: str, tool_name: str, args: Dict[str, Any]) -> str:
+            if slots is None:
+                return await self.call(server_name, tool_name, args)
+            async with slots:
+                return await self.call(server_name, tool_name, args)
+
+        results = await asyncio.gather(*(run(*call) for call in calls), return_exceptions=True)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return results
 
     async def close(self):
-        await self._stack.aclose()
-        self._sessions = {}
+        pools, self._pools = self._pools, {}
+        self._results.clear()
+        await asyncio.gather(*(pool.close() for pool in pools.values()), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pools": {name: pool.stats() for name, pool in self._pools.items()},
+            "result_cache": {
+                "entries": len(self._results),
+                "evictions": self._results.evictions,
+                "cacheable": self._cache_ttls,
+                "tools": self._cache_counts,
+            },
+        }
 
 
 def content_to_text(result: Any) -> str:
@@ -53,6 +627,14 @@ def content_to_text(result: Any) -> str:
     return str(content)
 
 
+def lease_ttl() -> float:
+    return float(os.getenv("A2A_LEASE_TTL", "15"))
+
+
+_registrations: Dict[str, Dict[str, Any]] = {}
+_heartbeats: Dict[str, asyncio.Task] = {}
+
+
 async def register_self(
     name: str,
     url: str,
@@ -66,25 +648,63 @@ async def register_self(
         "capabilities": capabilities,
         "mcp_tools": mcp_tools or [],
         "agent_card": agent_card,
+        "lease_ttl": lease_ttl() or None,
     }
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        resp = await client.post(f"{registry_url()}/register", json=payload)
-        resp.raise_for_status()
-        return resp.json()
+    _registrations[name] = payload
+    resp = await http_client().post(f"{registry_url()}/register", json=payload, timeout=20.0)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _heartbeat(name: str, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            resp = await http_client().post(
+                f"{registry_url()}/heartbeat", json={"name": name}, timeout=interval
+            )
+            if resp.status_code == 404:
+                payload = _registrations[name]
+                resp = await http_client().post(
+                    f"{registry_url()}/register", json=payload, timeout=interval
+                )
+            resp.raise_for_status()
+        except httpx.HTTPError:
+            continue
+
+
+def start_heartbeat(name: str):
+    ttl = lease_ttl()
+    if ttl > 0 and name not in _heartbeats:
+        _heartbeats[name] = asyncio.create_task(_heartbeat(name, ttl / 3))
+
+
+async def stop_heartbeat(name: str):
+    task = _heartbeats.pop(name, None)
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
 
 
 async def deregister_self(name: str):
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        resp = await client.post(f"{registry_url()}/deregister", json={"name": name})
-        resp.raise_for_status()
-        return resp.json()
+    await stop_heartbeat(name)
+    _registrations.pop(name, None)
+    resp = await http_client().post(
+        f"{registry_url()}/deregister", json={"name": name}, timeout=20.0
+    )
+    resp.raise_for_status()
+    return resp.json()
 
 
 async def discover_collaborator(capability: str, exclude_name: Optional[str] = None):
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        resp = await client.get(f"{registry_url()}/discover", params={"capability": capability})
-        resp.raise_for_status()
-        agents = resp.json().get("agents", [])
+    resp = await http_client().get(
+        f"{registry_url()}/discover", params={"capability": capability}, timeout=20.0
+    )
+    resp.raise_for_status()
+    agents = resp.json().get("agents", [])
     for agent in agents:
         if exclude_name and agent.get("name") == exclude_name:
             continue
@@ -92,23 +712,587 @@ async def discover_collaborator(capability: str, exclude_name: Optional[str] = N
     return None
 
 
-async def discover_collaborator_card(capability: str, exclude_name: Optional[str] = None):
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        resp = await client.get(f"{registry_url()}/cards", params={"capability": capability})
+class CardCache:
+    def __init__(self, ttl: float, stale_ttl: float, watch_interval: float, watch_timeout: float):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.watch_interval = watch_interval
+        self.watch_timeout = watch_timeout
+        self.revision: Optional[int] = None
+        self._entries: Dict[str, Tuple[float, List[Dict[str, Any]], Optional[str]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.not_modified = 0
+
+    def _cached(self, capability: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entries.get(capability)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self.hits += 1
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh(capability)
+                return entry[1]
+        self.misses += 1
+        return None
+
+    async def get(self, capability: str) -> List[Dict[str, Any]]:
+        with span("discover", capability=capability) as discover_span:
+            cards = self._cached(capability)
+            if cards is not None:
+                discover_span.set("cache", "hit")
+                return cards
+            discover_span.set("cache", "miss")
+            return await within_deadline(asyncio.shield(self._refresh(capability)))
+
+    async def get_many(self, capabilities: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        pending: Dict[str, asyncio.Task] = {}
+        missing: List[str] = []
+        for capability in dict.fromkeys(capabilities):
+            cards = self._cached(capability)
+            if cards is not None:
+                found[capability] = cards
+            elif capability in self._inflight:
+                pending[capability] = self._inflight[capability]
+            else:
+                missing.append(capability)
+        misses = len(missing) + len(pending)
+        with span("discover", capabilities=",".join(capabilities), misses=misses):
+            if missing:
+                pending.update(self._refresh_batch(missing))
+            for capability, future in pending.items():
+                found[capability] = await within_deadline(asyncio.shield(future))
+        return found
+
+    def _refresh(self, capability: str) -> asyncio.Future:
+        task = self._inflight.get(capability)
+        if task is None:
+            task = asyncio.create_task(self._fetch(capability))
+            task.add_done_callback(lambda t: self._on_fetched(capability, t))
+            self._inflight[capability] = task
+        return task
+
+    def _refresh_batch(self, capabilities: List[str]) -> Dict[str, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures: Dict[str, asyncio.Future] = {}
+        for capability in capabilities:
+            future = futures[capability] = self._inflight[capability] = loop.create_future()
+            future.add_done_callback(lambda f, c=capability: self._on_fetched(c, f))
+        batch = asyncio.create_task(self._fetch_batch(capabilities))
+        batch.add_done_callback(lambda t: self._settle_batch(futures, t))
+        return futures
+
+    def _settle_batch(self, futures: Dict[str, asyncio.Future], batch: asyncio.Task):
+        for capability, future in futures.items():
+            if future.done():
+                continue
+            if batch.cancelled():
+                future.cancel()
+            elif batch.exception() is not None:
+                future.set_exception(batch.exception())
+            else:
+                future.set_result(batch.result()[capability])
+
+    def _on_fetched(self, capability: str, task: asyncio.Future):
+        self._inflight.pop(capability, None)
+        if not task.cancelled():
+            task.exception()
+
+    def _store(
+        self,
+        capability: str,
+        cards: List[Dict[str, Any]],
+        seen: Optional[str],
+        etag: Optional[str],
+    ):
+        if seen is not None and self.revision is not None and int(seen) < self.revision:
+            return
+        if self.ttl > 0:
+            self._entries[capability] = (time.monotonic(), cards, etag)
+
+    async def _fetch(self, capability: str) -> List[Dict[str, Any]]:
+        entry = self._entries.get(capability)
+        headers = {"If-None-Match": entry[2]} if entry is not None and entry[2] else {}
+        resp = await http_client().get(
+            f"{registry_url()}/cards",
+            params={"capability": capability},
+            headers=headers,
+            timeout=20.0,
+        )
+        if resp.status_code == 304 and entry is not None:
+            self.not_modified += 1
+            cards = entry[1]
+        else:
+            resp.raise_for_status()
+            cards = resp.json().get("cards", [])
+        self._store(
+            capability, cards, resp.headers.get("X-Registry-Revision"), resp.headers.get("ETag")
+        )
+        return cards
+
+    async def _fetch_batch(self, capabilities: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        resp = await http_client().get(
+            f"{registry_url()}/cards/batch",
+            params=[("capability", capability) for capability in capabilities],
+            timeout=20.0,
+        )
         resp.raise_for_status()
-        cards = resp.json().get("cards", [])
-    for card in cards:
-        if exclude_name and card.get("name") == exclude_name:
-            continue
-        return card
-    return None
+        grouped = resp.json().get("cards", {})
+        seen = resp.headers.get("X-Registry-Revision")
+        result = {}
+        for capability in capabilities:
+            cards = result[capability] = grouped.get(capability, [])
+            # The batch response has no per-capability ETag; keep the one from /cards while
+            # the cards are unchanged so the next single fetch can still get a 304.
+            entry = self._entries.get(capability)
+            etag = entry[2] if entry is not None and entry[1] == cards else None
+            self._store(capability, cards, seen, etag)
+        return result
+
+    def peek(self, capability: str) -> List[Dict[str, Any]]:
+        entry = self._entries.get(capability)
+        return entry[1] if entry is not None else []
+
+    def invalidate(self, capability: Optional[str] = None):
+        self.invalidations += 1
+        keys = list(self._entries) if capability is None else [capability]
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (float("-inf"), entry[1], entry[2])
+
+    async def _watch(self):
+        while True:
+            try:
+                params = {"timeout": self.watch_timeout}
+                if self.revision is not None:
+                    params["since"] = self.revision
+                resp = await http_client().get(
+                    f"{registry_url()}/watch", params=params, timeout=self.watch_timeout + 10.0
+                )
+                resp.raise_for_status()
+                self.apply_watch(resp.json())
+            except (httpx.HTTPError, KeyError, ValueError):
+                await asyncio.sleep(self.watch_interval)
+
+    def apply_watch(self, body: Dict[str, Any]):
+        latest = int(body["revision"])
+        if body.get("reset") or (self.revision is not None and latest < self.revision):
+            self.invalidate()
+        else:
+            for event in body.get("events", []):
+                for key in event.get("keys", []):
+                    self.invalidate(key)
+        self.revision = latest
+
+    def start_watch(self):
+        if self._watch_task is None and self.watch_interval > 0:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop_watch(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+        self._watch_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "revision": self.revision,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "not_modified": self.not_modified,
+        }
+
+
+card_cache = CardCache(
+    ttl=float(os.getenv("CARD_CACHE_TTL", "30")),
+    stale_ttl=float(os.getenv("CARD_CACHE_STALE_TTL", "300")),
+    watch_interval=float(os.getenv("REGISTRY_WATCH_INTERVAL", "2")),
+    watch_timeout=float(os.getenv("REGISTRY_WATCH_TIMEOUT", "30")),
+)
+
+
+def _card_cache_metrics():
+    yield (
+        "a2a_card_cache_lookups_total",
+        "counter",
+        "Agent card lookups by outcome.",
+        ("result",),
+        [
+            (("hit",), card_cache.hits),
+            (("stale",), card_cache.stale_hits),
+            (("miss",), card_cache.misses),
+            (("not_modified",), card_cache.not_modified),
+        ],
+    )
+
+
+default_registry.collector(_card_cache_metrics)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Per-target breaker: closed -> open on a bad window -> half-open probe -> closed."""
+
+    def __init__(
+        self,
+        failure_rate: float,
+        min_calls: int,
+        window: int,
+        open_seconds: float,
+        slow_ms: float,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self.slow_ms = slow_ms
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+        self._outcomes: Deque[bool] = deque(maxlen=max(self.min_calls, window))
+        self._probing = False
+
+    def _cooled(self) -> bool:
+        return time.monotonic() - self.opened_at >= self.open_seconds
+
+    def available(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return self._cooled()
+        return not self._probing
+
+    def acquire(self) -> bool:
+        """Admit a call or raise CircuitOpenError; returns True when the call is the probe."""
+        if self.state == "open" and self._cooled():
+            self.state = "half_open"
+        if self.state == "closed":
+            return False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        raise CircuitOpenError("Circuit open for collaborator")
+
+    def release(self):
+        self._probing = False
+
+    def record(self, ok: bool, elapsed_ms: float, probe: bool = False):
+        failed = not ok or (self.slow_ms > 0 and elapsed_ms >= self.slow_ms)
+        if probe:
+            self._probing = False
+            if failed:
+                self._open()
+            else:
+                self.state = "closed"
+                self._outcomes.clear()
+            return
+        if self.state != "closed":
+            # Started before the breaker opened; it says nothing about the target now.
+            return
+        self._outcomes.append(failed)
+        if (
+            self.failure_rate > 0
+            and len(self._outcomes) >= self.min_calls
+            and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.opens += 1
+        self._outcomes.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"state": self.state, "opens": self.opens, "rejected": self.rejected}
+
+
+class InstanceStats:
+    def __init__(self, breaker: CircuitBreaker, samples: int = 128):
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.ewma_ms: Optional[float] = None
+        self.breaker = breaker
+        self.samples: Deque[float] = deque(maxlen=samples)
+
+    def observe(self, elapsed_ms: float, alpha: float):
+        if self.ewma_ms is None:
+            self.ewma_ms = elapsed_ms
+        else:
+            self.ewma_ms += alpha * (elapsed_ms - self.ewma_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        p95 = self.percentile(95)
+        return {
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ewma_ms": round(self.ewma_ms, 3) if self.ewma_ms is not None else None,
+            "p95_ms": round(p95, 3) if p95 is not None else None,
+            "breaker": self.breaker.as_dict(),
+        }
+
+
+OUTBOUND_LATENCY = histogram(
+    "a2a_outbound_request_duration_seconds",
+    "Time spent on calls to collaborator agents.",
+    ("target", "outcome"),
+)
+OUTBOUND_REJECTED = counter(
+    "a2a_outbound_rejected_total", "Collaborator calls refused by an open circuit.", ("target",)
+)
+
+
+class LoadBalancer:
+    POLICIES = ("first", "round_robin", "least_in_flight", "p2c")
+
+    def __init__(
+        self,
+        policy: str,
+        alpha: float = 0.3,
+        breaker: Callable[[], CircuitBreaker] = lambda: CircuitBreaker(0.0, 1, 1, 0.0, 0.0),
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        hedge_min_delay_ms: float = 5.0,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown load balancing policy: {policy}")
+        self.policy = policy
+        self.alpha = alpha
+        self.breaker = breaker
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay_ms = hedge_min_delay_ms
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._instances: Dict[str, InstanceStats] = {}
+        self._cursors: Dict[str, int] = {}
+
+    def instance(self, url: str) -> InstanceStats:
+        key = url.rstrip("/")
+        stats = self._instances.get(key)
+        if stats is None:
+            stats = self._instances[key] = InstanceStats(self.breaker())
+        return stats
+
+    def _cost(self, card: Dict[str, Any]) -> float:
+        stats = self.instance(card["url"])
+        return (stats.ewma_ms or 0.0) * (stats.in_flight + 1)
+
+    def pick(self, key: str, cards: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        cards = [card for card in cards if self.instance(card["url"]).breaker.available()] or cards
+        if len(cards) <= 1 or self.policy == "first":
+            return cards[0] if cards else None
+        if self.policy == "round_robin":
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return cards[cursor % len(cards)]
+        if self.policy == "least_in_flight":
+            return min(cards, key=lambda card: self.instance(card["url"]).in_flight)
+        first, second = random.sample(cards, 2)
+        return first if self._cost(first) <= self._cost(second) else second
+
+    def hedge_delay(self, url: str) -> Optional[float]:
+        if self.hedge_percentile is None:
+            return None
+        stats = self.instance(url)
+        if len(stats.samples) < self.hedge_min_samples:
+            return None
+        return max(stats.percentile(self.hedge_percentile), self.hedge_min_delay_ms) / 1000
+
+    @asynccontextmanager
+    async def track(self, url: str):
+        target = url.rstrip("/")
+        stats = self.instance(target)
+        try:
+            probe = stats.breaker.acquire()
+        except CircuitOpenError:
+            OUTBOUND_REJECTED.inc((target,))
+            raise
+        stats.in_flight += 1
+        stats.requests += 1
+        outcome = "ok"
+        started = time.perf_counter()
+        try:
+            yield stats
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            if probe:
+                stats.breaker.release()
+            raise
+        except BaseException:
+            outcome = "error"
+            stats.errors += 1
+            stats.breaker.record(False, 1000 * (time.perf_counter() - started), probe)
+            raise
+        else:
+            elapsed_ms = 1000 * (time.perf_counter() - started)
+            stats.breaker.record(True, elapsed_ms, probe)
+            stats.samples.append(elapsed_ms)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.in_flight -= 1
+            # A cancelled hedge loser was cut short; its time would drag the EWMA down.
+            if outcome != "cancelled":
+                stats.observe(1000 * elapsed, self.alpha)
+            OUTBOUND_LATENCY.observe(elapsed, (target, outcome))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "instances": {url: stats.as_dict() for url, stats in self._instances.items()},
+        }
+
+
+def _hedge_percentile() -> Optional[float]:
+    if os.getenv("A2A_HEDGE", "0").lower() not in ("1", "true", "yes"):
+        return None
+    return float(os.getenv("A2A_HEDGE_PERCENTILE", "95"))
+
+
+load_balancer = LoadBalancer(
+    policy=os.getenv("A2A_LB_POLICY", "round_robin"),
+    alpha=float(os.getenv("A2A_LB_EWMA_ALPHA", "0.3")),
+    breaker=partial(
+        CircuitBreaker,
+        failure_rate=float(os.getenv("A2A_BREAKER_FAILURE_RATE", "0.5")),
+        min_calls=int(os.getenv("A2A_BREAKER_MIN_CALLS", "10")),
+        window=int(os.getenv("A2A_BREAKER_WINDOW", "20")),
+        open_seconds=float(os.getenv("A2A_BREAKER_OPEN_SECONDS", "10")),
+        slow_ms=float(os.getenv("A2A_BREAKER_SLOW_MS", "10000")),
+    ),
+    hedge_percentile=_hedge_percentile(),
+    hedge_min_samples=int(os.getenv("A2A_HEDGE_MIN_SAMPLES", "20")),
+    hedge_min_delay_ms=float(os.getenv("A2A_HEDGE_MIN_DELAY_MS", "5")),
+)
+
+
+async def call_hedged(
+    attempt: Callable[[str], Awaitable[Any]],
+    agent_url: str,
+    capability: Optional[str] = None,
+    exclude_name: Optional[str] = None,
+) -> Any:
+    """Run ``attempt(agent_url)``; if it outlives the target's hedge delay, race a second
+    instance of ``capability`` and return whichever succeeds first."""
+    delay = load_balancer.hedge_delay(agent_url) if capability else None
+    if delay is None:
+        return await attempt(agent_url)
+    primary = asyncio.create_task(attempt(agent_url))
+    pending = {primary}
+    errors: List[BaseException] = []
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            alternates = [
+                card
+                for card in card_cache.peek(capability)
+                if card["url"].rstrip("/") != agent_url.rstrip("/")
+                and card.get("name") != exclude_name
+                and load_balancer.instance(card["url"]).breaker.available()
+            ]
+            backup = load_balancer.pick(capability, alternates)
+            if backup is not None:
+                load_balancer.hedges += 1
+                pending.add(asyncio.create_task(attempt(backup["url"])))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        load_balancer.hedge_wins += 1
+                    return task.result()
+                errors.append(task.exception())
+        raise errors[0]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def discover_collaborator_card(capability: str, exclude_name: Optional[str] = None):
+    cards = await card_cache.get(capability)
+    if exclude_name:
+        cards = [card for card in cards if card.get("name") != exclude_name]
+    return load_balancer.pick(capability, cards)
+
+
+async def discover_collaborator_cards(
+    capabilities: List[str], exclude_name: Optional[str] = None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    grouped = await card_cache.get_many(capabilities)
+    picked: Dict[str, Optional[Dict[str, Any]]] = {}
+    for capability in capabilities:
+        cards = grouped.get(capability, [])
+        if exclude_name:
+            cards = [card for card in cards if card.get("name") != exclude_name]
+        picked[capability] = load_balancer.pick(capability, cards)
+    return picked
+
+
+async def _post_collaborator(
+    agent_url: str, endpoint: str, payload: Dict[str, Any]
+) -> Dict[str, Any]:
+    timeout = hop_timeout(45.0)
+    url = f"{agent_url.rstrip('/')}{endpoint}"
+    with span(f"POST {endpoint}", kind="client", url=url) as call_span:
+        async with load_balancer.track(agent_url):
+            try:
+                resp = await http_client().post(
+                    url, json=with_deadline(payload), headers=trace_headers(), timeout=timeout
+                )
+            except httpx.TimeoutException:
+                check_deadline()
+                raise
+            call_span.set("http.status_code", resp.status_code)
+            if resp.status_code == 504:
+                raise DeadlineExceeded("Request deadline exceeded downstream")
+            resp.raise_for_status()
+            return resp.json()
 
 
 async def call_collaborator(
-    agent_url: str, payload: Dict[str, Any], query_endpoint: str = "/query"
+    agent_url: str,
+    payload: Dict[str, Any],
+    query_endpoint: str = "/query",
+    capability: Optional[str] = None,
+    exclude_name: Optional[str] = None,
 ) -> Dict[str, Any]:
     endpoint = query_endpoint if query_endpoint.startswith("/") else f"/{query_endpoint}"
-    async with httpx.AsyncClient(timeout=45.0) as client:
-        resp = await client.post(f"{agent_url.rstrip('/')}{endpoint}", json=payload)
-        resp.raise_for_status()
-        return resp.json()
+    return await call_hedged(
+        lambda url: _post_collaborator(url, endpoint, payload), agent_url, capability, exclude_name
+    )
+
+
+def runtime_stats() -> Dict[str, Any]:
+    return {
+        "http_pool": http_pool_stats(),
+        "card_cache": card_cache.stats(),
+        "load_balancer": load_balancer.stats(),
+    }
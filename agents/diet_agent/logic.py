@@ -17,16 +17,13 @@ async def close_tools():
 
 async def build_diet_plan(query: str, weight: float, context: Dict[str, Any]) -> Dict[str, Any]:
     protein_grams = int(weight * 1.8)
-    chicken_kcal = await mcp_client.call(
-        "nutrition_db", "get_calories", {"food": "chicken", "grams": 200}
-    )
-    rice_kcal = await mcp_client.call(
-        "nutrition_db", "get_calories", {"food": "rice", "grams": 250}
-    )
-    split = await mcp_client.call(
-        "nutrition_db",
-        "suggest_meal_split",
-        {"goal": query, "weight": weight},
+    chicken_kcal, rice_kcal, split = await mcp_client.call_many(
+        [
+            ("nutrition_db", "get_calories", {"food": "chicken", "grams": 200}),
+            ("nutrition_db", "get_calories", {"food": "rice", "grams": 250}),
+            ("nutrition_db", "suggest_meal_split", {"goal": query, "weight": weight}),
+        ],
+        return_exceptions=False,
     )
 
     plan: Dict[str, Any] = {
@@ -45,6 +42,8 @@ async def build_diet_plan(query: str, weight: float, context: Dict[str, Any]) ->
                 trainer_card["url"],
                 {"query": "best meal timing around workouts", "weight": weight, "context": {"skip_collab": True}},
                 trainer_card.get("query_endpoint", "/query"),
+                capability="personal-training",
+                exclude_name="diet_agent",
             )
             plan["trainer_note"] = suggestion.get("summary", "No trainer note")
 
@@ -16,15 +16,12 @@ async def close_tools():
 
 
 async def build_muscle_plan(query: str, weight: float, context: Dict[str, Any]) -> Dict[str, Any]:
-    exercises = await mcp_client.call(
-        "workout_db",
-        "get_exercises",
-        {"muscle_group": "legs"},
-    )
-    split = await mcp_client.call(
-        "workout_db",
-        "build_split",
-        {"goal": query},
+    exercises, split = await mcp_client.call_many(
+        [
+            ("workout_db", "get_exercises", {"muscle_group": "legs"}),
+            ("workout_db", "build_split", {"goal": query}),
+        ],
+        return_exceptions=False,
     )
     plan: Dict[str, Any] = {
         "strength_focus": exercises,
@@ -41,6 +38,8 @@ async def build_muscle_plan(query: str, weight: float, context: Dict[str, Any])
                 diet_card["url"],
                 {"query": "high protein meals for muscle gain", "weight": weight, "context": {"skip_collab": True}},
                 diet_card.get("query_endpoint", "/query"),
+                capability="nutrition",
+                exclude_name="muscle_agent",
             )
             plan["diet_support"] = diet_plan.get("plan", {})
 
@@ -1,44 +1,68 @@
 import asyncio
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
-from agents.common import call_collaborator, discover_collaborator_card
+from agents.common import call_collaborator, discover_collaborator_cards
 
+SECTIONS = {
+    "muscle": "muscle-building",
+    "cardio": "cardio-endurance",
+    "diet": "nutrition",
+}
 
-async def _call_if_available(card: Optional[Dict[str, Any]], payload: Dict[str, Any]):
+
+async def _call_if_available(
+    card: Optional[Dict[str, Any]], payload: Dict[str, Any], capability: str
+):
     if not card:
         return {"summary": "Agent unavailable", "plan": {}, "source": "none"}
-    return await call_collaborator(card["url"], payload, card.get("query_endpoint", "/query"))
+    return await call_collaborator(
+        card["url"],
+        payload,
+        card.get("query_endpoint", "/query"),
+        capability=capability,
+        exclude_name="trainer_agent",
+    )
 
 
-async def personal_trainer_plan(goal: str, weight: float) -> Dict[str, Any]:
-    muscle = await discover_collaborator_card("muscle-building", exclude_name="trainer_agent")
-    cardio = await discover_collaborator_card("cardio-endurance", exclude_name="trainer_agent")
-    diet = await discover_collaborator_card("nutrition", exclude_name="trainer_agent")
+async def personal_trainer_sections(
+    goal: str, weight: float
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    cards = await discover_collaborator_cards(list(SECTIONS.values()), exclude_name="trainer_agent")
 
     payload_base = {"weight": weight, "context": {"skip_collab": True}}
 
-    muscle_task = _call_if_available(
-        muscle,
-        {"query": f"muscle strategy for: {goal}", **payload_base},
-    )
-    cardio_task = _call_if_available(
-        cardio,
-        {"query": f"cardio strategy for: {goal}", **payload_base},
-    )
-    diet_task = _call_if_available(
-        diet,
-        {"query": f"diet strategy for: {goal}", **payload_base},
-    )
+    tasks = {
+        asyncio.create_task(
+            _call_if_available(
+                cards[capability],
+                {"query": f"{section} strategy for: {goal}", **payload_base},
+                capability,
+            )
+        ): section
+        for section, capability in SECTIONS.items()
+    }
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield tasks[task], task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
 
-    muscle_result, cardio_result, diet_result = await asyncio.gather(
-        muscle_task, cardio_task, diet_task
-    )
 
+def trainer_plan(goal: str, weight: float, sections: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
     return {
         "goal": goal,
         "weight_kg": weight,
         "trainer_schedule": "8-week blended block: 3 strength + 3 cardio + 7-day nutrition structure.",
-        "muscle": muscle_result,
-        "cardio": cardio_result,
-        "diet": diet_result,
+        **{section: sections[section] for section in SECTIONS},
+    }
+
+
+async def personal_trainer_plan(goal: str, weight: float) -> Dict[str, Any]:
+    sections = {
+        section: result async for section, result in personal_trainer_sections(goal, weight)
     }
+    return trainer_plan(goal, weight, sections)
@@ -1,14 +1,34 @@
+import json
+import os
 from typing import Any, Dict
 
 import uvicorn
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
-from agents.common import deregister_self, register_self
-from agents.trainer_agent.logic import personal_trainer_plan
+from agents.common import (
+    DeadlineExceeded,
+    card_cache,
+    close_http_client,
+    deadline_scope,
+    deregister_self,
+    register_self,
+    runtime_stats,
+    start_heartbeat,
+    start_http_client,
+)
+from agents.trainer_agent.logic import (
+    personal_trainer_plan,
+    personal_trainer_sections,
+    trainer_plan,
+)
+from telemetry.metrics import install_metrics
+from telemetry.tracing import TracingMiddleware, start_tracing, stop_tracing
 
 AGENT_NAME = "trainer_agent"
-AGENT_URL = "http://localhost:8005"
+AGENT_URL = os.getenv("AGENT_URL", "http://localhost:8005")
+INSTANCE_NAME = os.getenv("AGENT_INSTANCE_NAME", AGENT_NAME)
 CAPABILITIES = ["personal-training", "fitness-coaching"]
 AGENT_CARD = {
     "name": AGENT_NAME,
@@ -27,9 +47,12 @@ AGENT_CARD = {
     "query_endpoint": "/query",
     "health_endpoint": "/health",
     "collaborates_with": ["muscle_agent", "cardio_agent", "diet_agent"],
+    "metadata": {"stream_endpoint": "/query/stream"},
 }
 
 app = FastAPI(title="Trainer Agent")
+app.add_middleware(TracingMiddleware, service=INSTANCE_NAME)
+install_metrics(app)
 
 
 class QueryRequest(BaseModel):
@@ -40,37 +63,74 @@ class QueryRequest(BaseModel):
 
 @app.on_event("startup")
 async def startup():
-    await register_self(AGENT_NAME, AGENT_URL, CAPABILITIES, [], AGENT_CARD)
+    start_tracing(INSTANCE_NAME)
+    await start_http_client()
+    await register_self(INSTANCE_NAME, AGENT_URL, CAPABILITIES, [], AGENT_CARD)
+    start_heartbeat(INSTANCE_NAME)
+    card_cache.start_watch()
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    await deregister_self(AGENT_NAME)
+    await card_cache.stop_watch()
+    await deregister_self(INSTANCE_NAME)
+    await close_http_client()
+    await stop_tracing()
+
+
+def query_response(plan: Dict[str, Any]) -> Dict[str, Any]:
+    muscle_tools = plan.get("muscle", {}).get("tools_used", [])
+    cardio_tools = plan.get("cardio", {}).get("tools_used", [])
+    diet_tools = plan.get("diet", {}).get("tools_used", [])
+    return {
+        "summary": "Trainer plan synthesized from collaborator agents",
+        "plan": plan,
+        "source": "trainer_agent",
+        "collaborators_used": ["muscle_agent", "cardio_agent", "diet_agent"],
+        "tools_used": sorted(list(set(muscle_tools + cardio_tools + diet_tools))),
+    }
 
 
 @app.post("/query")
 async def query(req: QueryRequest):
     try:
-        plan = await personal_trainer_plan(req.query, req.weight)
-        muscle_tools = plan.get("muscle", {}).get("tools_used", [])
-        cardio_tools = plan.get("cardio", {}).get("tools_used", [])
-        diet_tools = plan.get("diet", {}).get("tools_used", [])
-        return {
-            "summary": "Trainer plan synthesized from collaborator agents",
-            "plan": plan,
-            "source": "trainer_agent",
-            "collaborators_used": ["muscle_agent", "cardio_agent", "diet_agent"],
-            "tools_used": sorted(list(set(muscle_tools + cardio_tools + diet_tools))),
-        }
+        with deadline_scope(req.context.get("timeout_ms")):
+            plan = await personal_trainer_plan(req.query, req.weight)
+        return query_response(plan)
+    except DeadlineExceeded as e:
+        raise HTTPException(504, str(e))
     except Exception as e:
         raise HTTPException(500, str(e))
 
 
+@app.post("/query/stream")
+async def query_stream(req: QueryRequest):
+    async def events():
+        sections: Dict[str, Dict[str, Any]] = {}
+        try:
+            with deadline_scope(req.context.get("timeout_ms")):
+                async for section, result in personal_trainer_sections(req.query, req.weight):
+                    sections[section] = result
+                    event = {"event": "section", "section": section, "data": result}
+                    yield json.dumps(event) + "\n"
+            plan = trainer_plan(req.query, req.weight, sections)
+            yield json.dumps({"event": "final", "data": query_response(plan)}) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @app.get("/health")
 async def health():
     return {"status": "healthy", "capabilities": CAPABILITIES}
 
 
+@app.get("/stats")
+async def stats():
+    return runtime_stats()
+
+
 @app.get("/agent-card")
 async def agent_card():
     return AGENT_CARD
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+from agents.common import MCPToolClient
+
+SERVERS = {
+    "nutrition_db": ("get_calories", {"food": "chicken", "grams": 200}),
+    "workout_db": ("get_exercises", {"muscle_group": "legs"}),
+    "progress_tracker": ("adjust_plan", {"fatigue_level": "moderate"}),
+}
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def bench_transport(
+    server: str, transport: str, calls: int, warmup: int, cached: bool = False
+) -> Dict[str, Any]:
+    tool, args = SERVERS[server]
+    script = os.path.join(os.path.dirname(__file__), "..", "mcp_servers", f"{server}.py")
+    client = MCPToolClient(min_sessions=1, max_sessions=1, result_cache_size=1024 if cached else 0)
+    await client.connect(server, script, transport=transport)
+    try:
+        for _ in range(warmup):
+            await client.call(server, tool, args)
+        samples = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            await client.call(server, tool, args)
+            samples.append((time.perf_counter() - started) * 1e6)
+    finally:
+        await client.close()
+    return {
+        "server": server,
+        "transport": transport + ("+cache" if cached else ""),
+        "calls": calls,
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(_percentile(samples, 50), 1),
+        "p99_us": round(_percentile(samples, 99), 1),
+    }
+
+
+async def main(args: argparse.Namespace):
+    results = []
+    for transport in ("stdio", "inprocess"):
+        results.append(await bench_transport(args.server, transport, args.calls, args.warmup))
+    results.append(await bench_transport(args.server, "stdio", args.calls, args.warmup, cached=True))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        print(
+            f"{row['server']:<18}{row['transport']:<13}"
+            f"mean={row['mean_us']:>9.1f}us  p50={row['p50_us']:>9.1f}us  p99={row['p99_us']:>9.1f}us"
+        )
+    speedup = results[0]["mean_us"] / results[1]["mean_us"]
+    print(f"in-process speedup: {speedup:.1f}x")
+    print(f"result cache hit: {results[2]['mean_us']:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare MCP per-call latency across transports and caching.")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="nutrition_db")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    asyncio.run(main(parser.parse_args()))
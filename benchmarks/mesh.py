@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# (name, app module, port offset); started in this order and stopped in reverse.
+SERVICES = [
+    ("registry", "registry.main", 0),
+    ("orchestrator", "orchestrator.main", 1),
+    ("muscle_agent", "agents.muscle_agent.main", 2),
+    ("cardio_agent", "agents.cardio_agent.main", 3),
+    ("diet_agent", "agents.diet_agent.main", 4),
+    ("trainer_agent", "agents.trainer_agent.main", 5),
+]
+
+GOALS = [
+    "Build muscle and improve endurance",
+    "Lose fat while keeping strength",
+    "Train for a first half marathon",
+    "Gain 5kg of lean mass in 12 weeks",
+    "Improve squat and deadlift numbers",
+    "Get fit for hiking season",
+    "Recomposition on a 4-day schedule",
+    "Improve 5k time without losing muscle",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def load_goals(path: Optional[str]) -> List[str]:
+    if path is None:
+        return GOALS
+    with open(path, encoding="utf-8") as f:
+        goals = [line.strip() for line in f if line.strip()]
+    if not goals:
+        raise SystemExit(f"No goals in {path}")
+    return goals
+
+
+def mesh_env(args: argparse.Namespace) -> Dict[str, str]:
+    env = {"MCP_TRANSPORT": args.mcp_transport}
+    if not args.plan_cache:
+        env["PLAN_CACHE_TTL"] = "0"
+    return env
+
+
+async def start_inprocess(
+    stack: AsyncExitStack, args: argparse.Namespace
+) -> Tuple[Dict[str, str], Dict[str, httpx.AsyncBaseTransport]]:
+    """Import every service into this process and route their HTTP calls over ASGI."""
+    from agents.common import close_http_client, start_http_client
+
+    urls = {name: f"http://{name}.mesh" for name, _, _ in SERVICES}
+    os.environ.update(mesh_env(args), REGISTRY_URL=urls["registry"])
+    os.environ.pop("AGENT_INSTANCE_NAME", None)
+    apps = {}
+    for name, module, _ in SERVICES:
+        os.environ["AGENT_URL"] = urls[name]
+        apps[name] = importlib.import_module(module).app
+    mounts = {urls[name]: httpx.ASGITransport(app=app) for name, app in apps.items()}
+
+    # Services share one module-level HTTP client here; each shutdown closes it,
+    # so it is reopened before the next service shuts down.
+    await start_http_client(mounts)
+    stack.push_async_callback(close_http_client)
+    for name, app in apps.items():
+        await stack.enter_async_context(app.router.lifespan_context(app))
+        stack.push_async_callback(start_http_client, mounts)
+    return urls, mounts
+
+
+async def wait_until_ready(client: httpx.AsyncClient, urls: Dict[str, str], timeout: float):
+    deadline = time.monotonic() + timeout
+    expected = {name for name, _, _ in SERVICES if name.endswith("_agent")}
+    while True:
+        try:
+            resp = await client.get(f"{urls['registry']}/agents")
+            registered = {agent["name"] for agent in resp.json().get("agents", [])}
+            health = await client.get(f"{urls['orchestrator']}/health")
+            if expected <= registered and health.status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise SystemExit("Mesh did not become ready in time")
+        await asyncio.sleep(0.2)
+
+
+async def wait_for_health(client: httpx.AsyncClient, url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(f"{url}/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise SystemExit(f"{url} did not become healthy in time")
+        await asyncio.sleep(0.2)
+
+
+async def start_processes(
+    stack: AsyncExitStack, args: argparse.Namespace
+) -> Dict[str, str]:
+    urls = {name: f"http://127.0.0.1:{args.base_port + offset}" for name, _, offset in SERVICES}
+    env = {**os.environ, **mesh_env(args), "REGISTRY_URL": urls["registry"]}
+    env.pop("AGENT_INSTANCE_NAME", None)
+    log_dir = args.log_dir
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    def stop(proc: subprocess.Popen):
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    for name, module, offset in SERVICES:
+        out = subprocess.DEVNULL
+        if log_dir:
+            out = stack.enter_context(open(os.path.join(log_dir, f"{name}.log"), "w"))
+        port = str(args.base_port + offset)
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", port],
+            cwd=ROOT,
+            env={**env, "AGENT_URL": urls[name]},
+            stdout=out,
+            stderr=subprocess.STDOUT,
+        )
+        stack.callback(stop, proc)
+        if name == "registry":
+            async with httpx.AsyncClient() as client:
+                await wait_for_health(client, urls["registry"], args.startup_timeout)
+    return urls
+
+
+async def snapshot(
+    client: httpx.AsyncClient, urls: Dict[str, str], shared: bool
+) -> Dict[str, Dict[str, Any]]:
+    stats = {"orchestrator": (await client.get(f"{urls['orchestrator']}/stats")).json()}
+    resp = await client.get(f"{urls['registry']}/agents")
+    for agent in resp.json().get("agents", []):
+        urls.setdefault(agent["name"], agent["url"])
+        try:
+            stats[agent["name"]] = (await client.get(f"{agent['url']}/stats")).json()
+        except httpx.HTTPError:
+            continue
+    if shared:
+        # In-process services share one load balancer; report its hops once.
+        for name, service in stats.items():
+            if name != "orchestrator":
+                service.pop("load_balancer", None)
+    return stats
+
+
+def _mcp_calls(service: Dict[str, Any]) -> int:
+    pools = service.get("mcp", {}).get("pools", {})
+    return sum(sum(pool.get("calls", [])) for pool in pools.values())
+
+
+def breakdown(
+    before: Dict[str, Dict[str, Any]],
+    after: Dict[str, Dict[str, Any]],
+    urls: Dict[str, str],
+    shared: bool,
+) -> Dict[str, Any]:
+    names = {url.rstrip("/"): name for name, url in urls.items()}
+    for service in after.values():
+        for url in service.get("load_balancer", {}).get("instances", {}):
+            names.setdefault(url, url)
+    hops: Dict[str, Any] = {}
+    mcp: Dict[str, int] = {}
+    for service, stats in after.items():
+        caller = "mesh" if shared else service
+        previous = before.get(service, {}).get("load_balancer", {}).get("instances", {})
+        for url, instance in stats.get("load_balancer", {}).get("instances", {}).items():
+            prior = previous.get(url, {})
+            requests = instance["requests"] - prior.get("requests", 0)
+            if requests <= 0:
+                continue
+            hops[f"{caller}->{names[url]}"] = {
+                "requests": requests,
+                "errors": instance["errors"] - prior.get("errors", 0),
+                "ewma_ms": instance["ewma_ms"],
+                "p95_ms": instance.get("p95_ms"),
+            }
+        if "mcp" in stats:
+            mcp[service] = _mcp_calls(stats) - _mcp_calls(before.get(service, {}))
+    plan_cache = after["orchestrator"].get("plan_cache", {})
+    prior_cache = before.get("orchestrator", {}).get("plan_cache", {})
+    return {
+        "hops": hops,
+        "mcp_calls": mcp,
+        "plan_cache": {
+            key: plan_cache.get(key, 0) - prior_cache.get(key, 0)
+            for key in ("hits", "misses", "coalesced")
+        },
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    url: str,
+    goals: List[str],
+    requests: int,
+    concurrency: int,
+    timeout: float,
+) -> Dict[str, Any]:
+    jobs = iter(range(requests))
+    samples: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def worker():
+        for i in jobs:
+            payload = {"goal": goals[i % len(goals)], "weight": 60.0 + (i * 7) % 40}
+            started = time.perf_counter()
+            try:
+                resp = await client.post(f"{url}/plan", json=payload, timeout=timeout)
+                status = str(resp.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == "200":
+                samples.append(elapsed_ms)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result: Dict[str, Any] = {
+        "requests": requests,
+        "ok": len(samples),
+        "errors": requests - len(samples),
+        "status_codes": statuses,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+    }
+    if samples:
+        result["latency_ms"] = {
+            "mean": round(statistics.fmean(samples), 3),
+            "p50": round(percentile(samples, 50), 3),
+            "p90": round(percentile(samples, 90), 3),
+            "p99": round(percentile(samples, 99), 3),
+            "max": round(max(samples), 3),
+        }
+    return result
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    goals = load_goals(args.goals)
+    async with AsyncExitStack() as stack:
+        mounts: Dict[str, httpx.AsyncBaseTransport] = {}
+        if args.target:
+            urls = {
+                "orchestrator": args.target.rstrip("/"),
+                "registry": args.registry.rstrip("/"),
+            }
+        elif args.mode == "inprocess":
+            urls, mounts = await start_inprocess(stack, args)
+        else:
+            urls = await start_processes(stack, args)
+
+        limits = httpx.Limits(
+            max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+        )
+        client = await stack.enter_async_context(httpx.AsyncClient(mounts=mounts, limits=limits))
+        await wait_until_ready(client, urls, args.startup_timeout)
+
+        shared = not args.target and args.mode == "inprocess"
+        orchestrator = urls["orchestrator"]
+        if args.warmup:
+            await drive(client, orchestrator, goals, args.warmup, args.concurrency, args.timeout)
+        before = await snapshot(client, urls, shared)
+        result = await drive(
+            client, orchestrator, goals, args.requests, args.concurrency, args.timeout
+        )
+        after = await snapshot(client, urls, shared)
+
+    return {
+        "mode": "target" if args.target else args.mode,
+        "mcp_transport": None if args.target else args.mcp_transport,
+        "plan_cache_enabled": bool(args.target) or args.plan_cache,
+        "concurrency": args.concurrency,
+        "goals": len(goals),
+        **result,
+        **breakdown(before, after, urls, shared),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test /plan across the full agent mesh.")
+    parser.add_argument("--mode", choices=("process", "inprocess"), default="process")
+    parser.add_argument("--target", help="benchmark an already running orchestrator instead")
+    parser.add_argument("--registry", default=os.getenv("REGISTRY_URL", "http://localhost:8000"))
+    parser.add_argument("--base-port", type=int, default=18000)
+    parser.add_argument("--mcp-transport", choices=("stdio", "inprocess"), default="stdio")
+    parser.add_argument(
+        "--plan-cache", action="store_true", help="keep the orchestrator plan cache on"
+    )
+    parser.add_argument("--goals", help="file with one goal per line")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--log-dir", help="write service logs here in process mode")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    report = json.dumps(asyncio.run(main(args)), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
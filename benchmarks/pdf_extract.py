@@ -0,0 +1,104 @@
+import argparse
+import json
+import statistics
+import time
+from io import BytesIO
+from typing import Any, Dict, List
+
+from PyPDF2 import PdfReader
+
+from scripts.mcp_server import DEFAULT_MAX_CHARS, extract_text
+
+LINE = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor."
+
+
+def build_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """Write a plain multi-page text PDF by hand so the benchmark needs no extra packages."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        text = "".join(
+            f"({page + 1}.{line + 1} {LINE}) Tj T* " for line in range(lines_per_page)
+        )
+        stream = f"BT /F1 9 Tf 11 TL 36 800 Td {text}ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    )
+    return out.getvalue()
+
+
+def extract_eager(pdf_bytes: bytes, max_chars: int) -> str:
+    """The previous behaviour: extract every page, then truncate."""
+    reader = PdfReader(BytesIO(pdf_bytes))
+    text = "".join(page.extract_text() or "" for page in reader.pages)
+    return text[:max_chars]
+
+
+def _time_ms(fn, *args, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def bench(pages: int, max_chars: int, repeat: int) -> Dict[str, Any]:
+    pdf_bytes = build_pdf(pages)
+    if extract_eager(pdf_bytes, max_chars) != extract_text(pdf_bytes, max_chars):
+        raise SystemExit(f"eager and lazy extraction disagree for {pages} pages")
+    eager = statistics.median(_time_ms(extract_eager, pdf_bytes, max_chars, repeat=repeat))
+    lazy = statistics.median(_time_ms(extract_text, pdf_bytes, max_chars, repeat=repeat))
+    return {
+        "pages": pages,
+        "pdf_kb": round(len(pdf_bytes) / 1024, 1),
+        "max_chars": max_chars,
+        "eager_ms": round(eager, 2),
+        "lazy_ms": round(lazy, 2),
+        "speedup": round(eager / lazy, 1),
+    }
+
+
+def main(args: argparse.Namespace):
+    results = [bench(pages, args.max_chars, args.repeat) for pages in args.pages]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        print(
+            f"{row['pages']:>5} pages ({row['pdf_kb']:>8.1f} KB)  "
+            f"eager={row['eager_ms']:>9.2f}ms  lazy={row['lazy_ms']:>7.2f}ms  "
+            f"speedup={row['speedup']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare eager and early-exit PDF text extraction on generated PDFs."
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--max-chars", type=int, default=DEFAULT_MAX_CHARS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    main(parser.parse_args())
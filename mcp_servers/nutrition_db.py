@@ -3,7 +3,7 @@ from fastmcp import FastMCP
 mcp = FastMCP("Nutrition Database")
 
 
-@mcp.tool
+@mcp.tool(meta={"cache_ttl": 3600})
 def get_calories(food: str, grams: int) -> str:
     data = {"chicken": 165, "rice": 130, "broccoli": 34, "oats": 389, "egg": 155}
     kcal_per_100 = data.get(food.lower(), 100)
@@ -11,7 +11,7 @@ def get_calories(food: str, grams: int) -> str:
     return f"{food}: {kcal:.1f} kcal for {grams}g"
 
 
-@mcp.tool
+@mcp.tool(meta={"cache_ttl": 3600})
 def suggest_meal_split(goal: str, weight: float) -> str:
     protein = weight * 1.8
     carbs = weight * 3.0
@@ -3,7 +3,7 @@ from fastmcp import FastMCP
 mcp = FastMCP("Progress Tracker")
 
 
-@mcp.tool
+@mcp.tool(meta={"cache_ttl": 3600})
 def estimate_progress(goal: str, weeks: int, weight: float) -> str:
     return (
         f"For goal '{goal}', expect measurable cardio improvements within {weeks} weeks "
@@ -11,7 +11,7 @@ def estimate_progress(goal: str, weeks: int, weight: float) -> str:
     )
 
 
-@mcp.tool
+@mcp.tool(meta={"cache_ttl": 3600})
 def adjust_plan(fatigue_level: str) -> str:
     fatigue = fatigue_level.lower()
     if fatigue == "high":
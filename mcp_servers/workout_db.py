@@ -3,7 +3,7 @@ from fastmcp import FastMCP
 mcp = FastMCP("Workout Database")
 
 
-@mcp.tool
+@mcp.tool(meta={"cache_ttl": 3600})
 def get_exercises(muscle_group: str) -> str:
     exercises = {
         "chest": "Bench Press, Incline Press, Cable Fly",
@@ -14,7 +14,7 @@ def get_exercises(muscle_group: str) -> str:
     return exercises.get(muscle_group.lower(), "No exercises found")
 
 
-@mcp.tool
+@mcp.tool(meta={"cache_ttl": 3600})
 def build_split(goal: str) -> str:
     if "muscle" in goal.lower():
         return "Push/Pull/Legs split repeated over 6 training days."
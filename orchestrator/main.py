@@ -1,63 +1,287 @@
+import asyncio
+import json
 import os
-from typing import Any, Dict
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
 import httpx
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from agents.common import (
+    CircuitOpenError,
+    DeadlineExceeded,
+    TTLCache,
+    call_collaborator,
+    card_cache,
+    close_http_client,
+    deadline_scope,
+    hop_timeout,
+    http_client,
+    load_balancer,
+    runtime_stats,
+    start_http_client,
+    with_deadline,
+    within_deadline,
+)
+from telemetry.metrics import default_registry, install_metrics
+from telemetry.tracing import (
+    TracingMiddleware,
+    span,
+    start_tracing,
+    stop_tracing,
+    trace_headers,
+)
+
 app = FastAPI(title="Fitness A2A Orchestrator")
+app.add_middleware(TracingMiddleware, service="orchestrator")
+install_metrics(app)
+
+PLAN_DEADLINE_MS = float(os.getenv("PLAN_DEADLINE_MS", "30000"))
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "60"))
+PLAN_WEIGHT_BUCKET = float(os.getenv("PLAN_CACHE_WEIGHT_BUCKET", "1.0"))
+plan_cache = TTLCache(int(os.getenv("PLAN_CACHE_SIZE", "512")))
+plan_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+_inflight_plans: Dict[Tuple[str, float], asyncio.Task] = {}
+
+
+def _plan_metrics():
+    yield (
+        "orchestrator_plan_requests_total",
+        "counter",
+        "/plan requests by plan cache outcome.",
+        ("result",),
+        [
+            (("hit",), plan_stats["hits"]),
+            (("miss",), plan_stats["misses"]),
+            (("coalesced",), plan_stats["coalesced"]),
+        ],
+    )
+    yield (
+        "orchestrator_plans_in_flight",
+        "gauge",
+        "Distinct plans currently being built.",
+        (),
+        [((), len(_inflight_plans))],
+    )
+
 
-REGISTRY_URL = os.getenv("REGISTRY_URL", "http://localhost:8000").rstrip("/")
+default_registry.collector(_plan_metrics)
 
 
 class PlanRequest(BaseModel):
     goal: str
     weight: float = 70.0
+    timeout_ms: Optional[float] = None
 
 
 async def discover_card(capability: str):
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        resp = await client.get(f"{REGISTRY_URL}/cards", params={"capability": capability})
-        resp.raise_for_status()
-        cards = resp.json().get("cards", [])
-    return cards[0] if cards else None
+    cards = await card_cache.get(capability)
+    return load_balancer.pick(capability, cards)
 
 
-async def call_agent(agent_url: str, payload: Dict[str, Any], query_endpoint: str = "/query"):
-    endpoint = query_endpoint if query_endpoint.startswith("/") else f"/{query_endpoint}"
-    async with httpx.AsyncClient(timeout=45.0) as client:
-        resp = await client.post(f"{agent_url.rstrip('/')}{endpoint}", json=payload)
-        resp.raise_for_status()
-        return resp.json()
+async def stream_agent(
+    agent_url: str, payload: Dict[str, Any], stream_endpoint: str
+) -> AsyncIterator[Dict[str, Any]]:
+    endpoint = stream_endpoint if stream_endpoint.startswith("/") else f"/{stream_endpoint}"
+    timeout = hop_timeout(45.0)
+    url = f"{agent_url.rstrip('/')}{endpoint}"
+    with span(f"POST {endpoint}", kind="client", url=url) as call_span:
+        async with load_balancer.track(agent_url):
+            async with http_client().stream(
+                "POST",
+                url,
+                json=with_deadline(payload),
+                headers=trace_headers(),
+                timeout=timeout,
+            ) as resp:
+                call_span.set("http.status_code", resp.status_code)
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if line.strip():
+                        yield json.loads(line)
 
 
-@app.post("/plan")
-async def create_plan(req: PlanRequest):
+async def trainer_events(
+    trainer_card: Dict[str, Any], payload: Dict[str, Any]
+) -> AsyncIterator[Dict[str, Any]]:
+    stream_endpoint = trainer_card.get("metadata", {}).get("stream_endpoint")
+    if not stream_endpoint:
+        result = await call_collaborator(
+            trainer_card["url"],
+            payload,
+            trainer_card.get("query_endpoint", "/query"),
+            capability="personal-training",
+        )
+        yield {"event": "final", "data": result}
+        return
+    async for event in stream_agent(trainer_card["url"], payload, stream_endpoint):
+        yield event
+
+
+@app.on_event("startup")
+async def startup():
+    start_tracing("orchestrator")
+    await start_http_client()
+    card_cache.start_watch()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await card_cache.stop_watch()
+    await close_http_client()
+    await stop_tracing()
+
+
+def plan_timeout_ms(req: PlanRequest) -> Optional[float]:
+    budgets = [PLAN_DEADLINE_MS] if PLAN_DEADLINE_MS > 0 else []
+    if req.timeout_ms is not None:
+        budgets.append(req.timeout_ms)
+    return min(budgets) if budgets else None
+
+
+def plan_key(req: PlanRequest) -> Tuple[str, float]:
+    goal = " ".join(req.goal.lower().split())
+    if PLAN_WEIGHT_BUCKET <= 0:
+        return goal, req.weight
+    return goal, round(req.weight / PLAN_WEIGHT_BUCKET) * PLAN_WEIGHT_BUCKET
+
+
+def plan_response(trainer_card: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "orchestrator_used": "fitness_orchestrator",
+        "trainer_agent": trainer_card["name"],
+        "trainer_card_used": trainer_card,
+        "tools_used": result.get("tools_used", []),
+        "result": result,
+    }
+
+
+async def build_plan(goal: str, weight: float) -> Dict[str, Any]:
     trainer_card = await discover_card("personal-training")
     if not trainer_card:
         raise HTTPException(404, "No trainer agent found")
 
-    payload = {"query": req.goal, "weight": req.weight, "context": {}}
+    payload = {"query": goal, "weight": weight, "context": {}}
     try:
-        result = await call_agent(
-            trainer_card["url"], payload, trainer_card.get("query_endpoint", "/query")
+        result = await call_collaborator(
+            trainer_card["url"],
+            payload,
+            trainer_card.get("query_endpoint", "/query"),
+            capability="personal-training",
         )
-        return {
-            "orchestrator_used": "fitness_orchestrator",
-            "trainer_agent": trainer_card["name"],
-            "trainer_card_used": trainer_card,
-            "tools_used": result.get("tools_used", []),
-            "result": result,
-        }
+        return plan_response(trainer_card, result)
+    except CircuitOpenError as e:
+        raise HTTPException(503, str(e))
     except httpx.HTTPError as e:
         raise HTTPException(502, f"Agent call failed: {str(e)}")
 
 
+async def _build_and_cache(key: Tuple[str, float], req: PlanRequest) -> Dict[str, Any]:
+    # Shared by every coalesced caller, so only PLAN_DEADLINE_MS bounds the build; each
+    # caller bounds its own wait on it.
+    with deadline_scope(PLAN_DEADLINE_MS if PLAN_DEADLINE_MS > 0 else None):
+        # Built for the bucketed weight so the cached plan matches every request in the bucket.
+        plan = await build_plan(req.goal, key[1])
+    plan_cache.put(key, plan, PLAN_CACHE_TTL)
+    return plan
+
+
+def _plan_settled(key: Tuple[str, float], task: asyncio.Task):
+    _inflight_plans.pop(key, None)
+    if not task.cancelled():
+        task.exception()
+
+
+@app.post("/plan")
+async def create_plan(req: PlanRequest, response: Response):
+    key = plan_key(req)
+    plan = plan_cache.get(key)
+    if plan is not None:
+        plan_stats["hits"] += 1
+        response.headers["X-Plan-Cache"] = "hit"
+        return plan
+
+    timeout_ms = plan_timeout_ms(req)
+    if timeout_ms is not None and timeout_ms <= 0:
+        raise HTTPException(504, "Request deadline exceeded")
+    task = _inflight_plans.get(key)
+    if task is None:
+        plan_stats["misses"] += 1
+        response.headers["X-Plan-Cache"] = "miss"
+        # Created outside this request's deadline scope so its budget is not inherited.
+        task = asyncio.create_task(_build_and_cache(key, req))
+        _inflight_plans[key] = task
+        task.add_done_callback(lambda t: _plan_settled(key, t))
+    else:
+        plan_stats["coalesced"] += 1
+        response.headers["X-Plan-Cache"] = "coalesced"
+    try:
+        with deadline_scope(timeout_ms):
+            return await within_deadline(asyncio.shield(task))
+    except DeadlineExceeded as e:
+        raise HTTPException(504, str(e))
+
+
+@app.post("/plan/stream")
+async def create_plan_stream(req: PlanRequest):
+    key = plan_key(req)
+    timeout_ms = plan_timeout_ms(req)
+    started = time.monotonic()
+    cached = plan_cache.get(key)
+    try:
+        with deadline_scope(timeout_ms):
+            trainer_card = None if cached is not None else await discover_card("personal-training")
+    except DeadlineExceeded as e:
+        raise HTTPException(504, str(e))
+    if cached is None and not trainer_card:
+        raise HTTPException(404, "No trainer agent found")
+
+    async def events():
+        if cached is not None:
+            plan_stats["hits"] += 1
+            yield json.dumps({"event": "final", "data": cached}) + "\n"
+            return
+        plan_stats["misses"] += 1
+        payload = {"query": req.goal, "weight": key[1], "context": {}}
+        remaining_ms = None
+        if timeout_ms is not None:
+            remaining_ms = timeout_ms - (time.monotonic() - started) * 1000
+        try:
+            with deadline_scope(remaining_ms):
+                async for event in trainer_events(trainer_card, payload):
+                    if event.get("event") == "final":
+                        plan = plan_response(trainer_card, event["data"])
+                        plan_cache.put(key, plan, PLAN_CACHE_TTL)
+                        event = {"event": "final", "data": plan}
+                    yield json.dumps(event) + "\n"
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+        except httpx.HTTPError as e:
+            yield json.dumps({"event": "error", "detail": f"Agent call failed: {str(e)}"}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
 
 
+@app.get("/stats")
+async def stats():
+    return {
+        **runtime_stats(),
+        "plan_cache": {
+            **plan_stats,
+            "entries": len(plan_cache),
+            "evictions": plan_cache.evictions,
+            "in_flight": len(_inflight_plans),
+        },
+    }
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
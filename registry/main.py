@@ -1,26 +1,160 @@
-from typing import List, Optional
+import asyncio
+import hashlib
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from pydantic import BaseModel
 
 from registry.models import (
     AgentDeregistration,
     AgentCard,
+    AgentHeartbeat,
     AgentInfo,
     AgentRegistration,
+    CardBatchResponse,
     CardDiscoverResponse,
     DiscoverResponse,
 )
+from registry.store import RegistryStore
+from telemetry.metrics import counter, default_registry, install_metrics
 
 app = FastAPI(title="A2A Registry")
+install_metrics(app)
 
-registry: List[AgentInfo] = []
+store = RegistryStore(change_log_size=int(os.getenv("REGISTRY_CHANGE_LOG_SIZE", "1024")))
+
+REAP_INTERVAL = float(os.getenv("REGISTRY_REAP_INTERVAL", "1"))
+PROBE_INTERVAL = float(os.getenv("REGISTRY_HEALTH_PROBE_INTERVAL", "0"))
+PROBE_TIMEOUT = float(os.getenv("REGISTRY_HEALTH_PROBE_TIMEOUT", "2"))
+PROBE_CONCURRENCY = int(os.getenv("REGISTRY_HEALTH_PROBE_CONCURRENCY", "16"))
+PROBE_FAILURES = int(os.getenv("REGISTRY_HEALTH_PROBE_FAILURES", "2"))
+
+_background: List[asyncio.Task] = []
+_probe_failures: Dict[str, int] = {}
+
+RESPONSE_CACHE_SIZE = int(os.getenv("REGISTRY_RESPONSE_CACHE_SIZE", "256"))
+_responses: Dict[Tuple[Any, ...], Tuple[str, bytes]] = {}
+_responses_revision = 0
+
+DISCOVERY_REQUESTS = counter(
+    "registry_discovery_requests_total",
+    "Discovery responses served, by endpoint and response cache outcome.",
+    ("endpoint", "result"),
+)
+
+
+def _registry_metrics():
+    statuses: Dict[str, int] = {}
+    for agent in store.all():
+        statuses[agent.status] = statuses.get(agent.status, 0) + 1
+    yield (
+        "registry_agents",
+        "gauge",
+        "Registered agents by status.",
+        ("status",),
+        [((status,), count) for status, count in statuses.items()],
+    )
+    yield ("registry_revision", "gauge", "Current registry revision.", (), [((), store.revision)])
+
+
+default_registry.collector(_registry_metrics)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _cached_json(
+    request: Request,
+    key: Tuple[Any, ...],
+    build: Callable[[], BaseModel],
+) -> Response:
+    global _responses_revision
+    if _responses_revision != store.revision:
+        _responses.clear()
+        _responses_revision = store.revision
+    cached = _responses.get(key)
+    result = "hit"
+    if cached is None:
+        result = "miss"
+        body = build().model_dump_json().encode()
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        if len(_responses) >= RESPONSE_CACHE_SIZE:
+            del _responses[next(iter(_responses))]
+        cached = _responses[key] = (etag, body)
+    etag, body = cached
+    headers = {"ETag": etag, "X-Registry-Revision": str(store.revision)}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        DISCOVERY_REQUESTS.inc((key[0], "not_modified"))
+        return Response(status_code=304, headers=headers)
+    DISCOVERY_REQUESTS.inc((key[0], result))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _reap_expired_leases():
+    while True:
+        await asyncio.sleep(REAP_INTERVAL)
+        for name in store.expire(time.monotonic()):
+            _probe_failures.pop(name, None)
+
+
+async def _probe(client: httpx.AsyncClient, slots: asyncio.Semaphore, agent: AgentInfo):
+    card = agent.agent_card
+    endpoint = card.health_endpoint if card is not None else "/health"
+    endpoint = endpoint if endpoint.startswith("/") else f"/{endpoint}"
+    async with slots:
+        try:
+            resp = await client.get(f"{agent.url}{endpoint}", timeout=PROBE_TIMEOUT)
+            healthy = resp.status_code < 500
+        except httpx.HTTPError:
+            healthy = False
+    if store.get(agent.name) is not agent:
+        return
+    if healthy:
+        _probe_failures.pop(agent.name, None)
+        store.set_status(agent.name, "alive")
+        return
+    _probe_failures[agent.name] = _probe_failures.get(agent.name, 0) + 1
+    if _probe_failures[agent.name] >= PROBE_FAILURES:
+        store.set_status(agent.name, "unhealthy")
+
+
+async def _probe_health():
+    slots = asyncio.Semaphore(PROBE_CONCURRENCY)
+    async with httpx.AsyncClient() as client:
+        while True:
+            await asyncio.sleep(PROBE_INTERVAL)
+            await asyncio.gather(*(_probe(client, slots, agent) for agent in store.all()))
+
+
+@app.on_event("startup")
+async def startup():
+    _background.append(asyncio.create_task(_reap_expired_leases()))
+    if PROBE_INTERVAL > 0:
+        _background.append(asyncio.create_task(_probe_health()))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in _background:
+        task.cancel()
+    await asyncio.gather(*_background, return_exceptions=True)
+    _background.clear()
 
 
 @app.post("/register")
 async def register(agent: AgentRegistration):
-    global registry
-    registry = [a for a in registry if a.name != agent.name]
-    registry.append(
+    _probe_failures.pop(agent.name, None)
+    store.put(
         AgentInfo(
             name=agent.name,
             url=agent.url.rstrip("/"),
@@ -29,65 +163,100 @@ async def register(agent: AgentRegistration):
             metadata=agent.metadata,
             status="alive",
             agent_card=agent.agent_card,
-        )
+        ),
+        lease_ttl=agent.lease_ttl,
+        now=time.monotonic(),
     )
-    return {"status": "registered", "name": agent.name}
+    return {"status": "registered", "name": agent.name, "revision": store.revision}
+
+
+@app.post("/heartbeat")
+async def heartbeat(payload: AgentHeartbeat):
+    if not store.renew(payload.name, time.monotonic()):
+        raise HTTPException(404, f"Agent not registered: {payload.name}")
+    return {"status": "renewed", "name": payload.name}
 
 
 @app.post("/deregister")
 async def deregister(payload: AgentDeregistration):
-    global registry
-    before = len(registry)
-    registry = [a for a in registry if a.name != payload.name]
-    removed = before - len(registry)
-    if removed:
-        return {"status": "removed", "name": payload.name}
+    if store.remove(payload.name) is not None:
+        return {"status": "removed", "name": payload.name, "revision": store.revision}
     return {"status": "not_found", "name": payload.name}
 
 
 @app.get("/discover", response_model=DiscoverResponse)
-async def discover(capability: Optional[str] = None, name: Optional[str] = None):
-    matches: List[AgentInfo] = []
-    for agent in registry:
-        if agent.status != "alive":
-            continue
-        if name and agent.name != name:
-            continue
-        if capability and capability not in agent.capabilities and capability not in agent.mcp_tools:
-            continue
-        matches.append(agent)
-    return DiscoverResponse(agents=matches)
+async def discover(
+    request: Request, capability: Optional[str] = None, name: Optional[str] = None
+):
+    return _cached_json(
+        request,
+        ("discover", capability, name),
+        lambda: DiscoverResponse(agents=store.find(capability, name)),
+    )
 
 
 @app.get("/agents", response_model=DiscoverResponse)
-async def agents():
-    return DiscoverResponse(agents=[a for a in registry if a.status == "alive"])
+async def agents(request: Request):
+    return _cached_json(
+        request, ("agents", None, None), lambda: DiscoverResponse(agents=store.alive())
+    )
 
 
 @app.get("/cards", response_model=CardDiscoverResponse)
-async def cards(capability: Optional[str] = None, name: Optional[str] = None):
-    matches: List[AgentCard] = []
-    for agent in registry:
-        if agent.status != "alive" or agent.agent_card is None:
-            continue
-        card = agent.agent_card
-        if name and card.name != name:
-            continue
-        if capability and capability not in card.capabilities and capability not in card.mcp_tools:
-            continue
-        matches.append(card)
-    return CardDiscoverResponse(cards=matches)
+async def cards(
+    request: Request, capability: Optional[str] = None, name: Optional[str] = None
+):
+    return _cached_json(
+        request,
+        ("cards", capability, name),
+        lambda: CardDiscoverResponse(cards=store.find_cards(capability, name)),
+    )
+
+
+@app.get("/cards/batch", response_model=CardBatchResponse)
+async def cards_batch(
+    request: Request,
+    capability: List[str] = Query(default_factory=list),
+    exclude: List[str] = Query(default_factory=list),
+):
+    capabilities = list(dict.fromkeys(capability))
+    excluded = set(exclude)
+
+    def build() -> CardBatchResponse:
+        return CardBatchResponse(
+            cards={
+                cap: [card for card in store.find_cards(cap) if card.name not in excluded]
+                for cap in capabilities
+            }
+        )
+
+    return _cached_json(request, ("batch", tuple(capabilities), tuple(sorted(excluded))), build)
 
 
 @app.get("/agent-card/{name}", response_model=AgentCard)
 async def agent_card(name: str):
-    for agent in registry:
-        if agent.status == "alive" and agent.name == name and agent.agent_card is not None:
-            return agent.agent_card
+    agent = store.get(name)
+    if agent is not None and agent.status == "alive" and agent.agent_card is not None:
+        return agent.agent_card
     raise HTTPException(404, f"Agent card not found: {name}")
 
 
+@app.get("/revision")
+async def get_revision():
+    return {"revision": store.revision}
+
+
+@app.get("/watch")
+async def watch(since: Optional[int] = None, timeout: float = 30.0):
+    if since is None:
+        return {"revision": store.revision, "events": []}
+    await store.wait_for_change(since, min(max(timeout, 0.0), 60.0))
+    events = store.changes_since(since)
+    if events is None:
+        return {"revision": store.revision, "reset": True, "agents": store.alive()}
+    return {"revision": store.revision, "events": events}
+
+
 @app.get("/health")
 async def health():
-    alive = len([a for a in registry if a.status == "alive"])
-    return {"status": "healthy", "agents_alive": alive}
+    return {"status": "healthy", "agents_alive": len(store.alive()), "revision": store.revision}
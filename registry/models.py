@@ -25,12 +25,17 @@ class AgentRegistration(BaseModel):
     mcp_tools: List[str] = Field(default_factory=list)
     metadata: Dict[str, Any] = Field(default_factory=dict)
     agent_card: Optional[AgentCard] = None
+    lease_ttl: Optional[float] = None
 
 
 class AgentDeregistration(BaseModel):
     name: str
 
 
+class AgentHeartbeat(BaseModel):
+    name: str
+
+
 class AgentInfo(BaseModel):
     name: str
     url: str
@@ -47,3 +52,7 @@ class DiscoverResponse(BaseModel):
 
 class CardDiscoverResponse(BaseModel):
     cards: List[AgentCard]
+
+
+class CardBatchResponse(BaseModel):
+    cards: Dict[str, List[AgentCard]]
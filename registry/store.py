@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from registry.models import AgentCard, AgentInfo
+
+Index = Dict[str, Dict[str, AgentInfo]]
+
+
+def _index_add(index: Index, keys: Iterable[str], agent: AgentInfo):
+    for key in keys:
+        index.setdefault(key, {})[agent.name] = agent
+
+
+def _index_remove(index: Index, keys: Iterable[str], name: str):
+    for key in keys:
+        bucket = index.get(key)
+        if bucket is None:
+            continue
+        bucket.pop(name, None)
+        if not bucket:
+            del index[key]
+
+
+def _lookup(
+    capabilities: Index, tools: Index, key: str, order: Dict[str, int]
+) -> Dict[str, AgentInfo]:
+    by_capability = capabilities.get(key)
+    by_tool = tools.get(key)
+    if by_tool is None:
+        return by_capability or {}
+    if by_capability is None:
+        return by_tool
+    merged = {**by_capability, **by_tool}
+    return {name: merged[name] for name in sorted(merged, key=order.__getitem__)}
+
+
+def _contains(capabilities: Index, tools: Index, key: str, name: str) -> bool:
+    return name in capabilities.get(key, {}) or name in tools.get(key, {})
+
+
+def _keys(agent: Optional[AgentInfo]) -> Set[str]:
+    if agent is None:
+        return set()
+    keys = set(agent.capabilities) | set(agent.mcp_tools)
+    if agent.agent_card is not None:
+        keys |= set(agent.agent_card.capabilities) | set(agent.agent_card.mcp_tools)
+    return keys
+
+
+class RegistryStore:
+    def __init__(self, change_log_size: int = 1024):
+        self.revision = 0
+        self._changes: Deque[Dict[str, Any]] = deque(maxlen=change_log_size)
+        self._changed: Optional[asyncio.Event] = None
+        self._agents: Dict[str, AgentInfo] = {}
+        self._by_capability: Index = {}
+        self._by_tool: Index = {}
+        self._cards_by_capability: Index = {}
+        self._cards_by_tool: Index = {}
+        self._cards_by_name: Index = {}
+        self._order: Dict[str, int] = {}
+        self._sequence = 0
+        self._leases: Dict[str, Tuple[float, float]] = {}
+        self._expiries: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def get(self, name: str) -> Optional[AgentInfo]:
+        return self._agents.get(name)
+
+    def put(self, agent: AgentInfo, lease_ttl: Optional[float] = None, now: float = 0.0):
+        previous = self._unindex(agent.name)
+        if lease_ttl:
+            self._leases[agent.name] = (lease_ttl, now + lease_ttl)
+            heapq.heappush(self._expiries, (now + lease_ttl, agent.name))
+        self._agents[agent.name] = agent
+        self._sequence += 1
+        self._order[agent.name] = self._sequence
+        _index_add(self._by_capability, agent.capabilities, agent)
+        _index_add(self._by_tool, agent.mcp_tools, agent)
+        if agent.agent_card is not None:
+            _index_add(self._cards_by_capability, agent.agent_card.capabilities, agent)
+            _index_add(self._cards_by_tool, agent.agent_card.mcp_tools, agent)
+            _index_add(self._cards_by_name, [agent.agent_card.name], agent)
+        self._record("put", agent, _keys(previous) | _keys(agent))
+
+    def remove(self, name: str) -> Optional[AgentInfo]:
+        agent = self._unindex(name)
+        if agent is not None:
+            self._record("delete", agent, _keys(agent))
+        return agent
+
+    def renew(self, name: str, now: float) -> bool:
+        if name not in self._agents:
+            return False
+        lease = self._leases.get(name)
+        if lease is not None:
+            self._leases[name] = (lease[0], now + lease[0])
+            heapq.heappush(self._expiries, (now + lease[0], name))
+        return True
+
+    def expire(self, now: float) -> List[str]:
+        expired = []
+        while self._expiries and self._expiries[0][0] <= now:
+            _, name = heapq.heappop(self._expiries)
+            lease = self._leases.get(name)
+            if lease is not None and lease[1] <= now:
+                self.remove(name)
+                expired.append(name)
+        return expired
+
+    def set_status(self, name: str, status: str) -> bool:
+        agent = self._agents.get(name)
+        if agent is None or agent.status == status:
+            return False
+        agent.status = status
+        self._record("put", agent, _keys(agent))
+        return True
+
+    def _record(self, kind: str, agent: AgentInfo, keys: Set[str]):
+        self.revision += 1
+        self._changes.append(
+            {
+                "revision": self.revision,
+                "type": kind,
+                "name": agent.name,
+                "keys": sorted(keys),
+                "agent": agent.model_dump(),
+            }
+        )
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    def changes_since(self, revision: int) -> Optional[List[Dict[str, Any]]]:
+        if revision > self.revision:
+            return None
+        if revision == self.revision:
+            return []
+        if not self._changes or self._changes[0]["revision"] > revision + 1:
+            return None
+        return list(islice(self._changes, revision + 1 - self._changes[0]["revision"], None))
+
+    async def wait_for_change(self, revision: int, timeout: float) -> bool:
+        if self.revision != revision:
+            return True
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _unindex(self, name: str) -> Optional[AgentInfo]:
+        agent = self._agents.pop(name, None)
+        if agent is None:
+            return None
+        del self._order[name]
+        self._leases.pop(name, None)
+        _index_remove(self._by_capability, agent.capabilities, name)
+        _index_remove(self._by_tool, agent.mcp_tools, name)
+        if agent.agent_card is not None:
+            _index_remove(self._cards_by_capability, agent.agent_card.capabilities, name)
+            _index_remove(self._cards_by_tool, agent.agent_card.mcp_tools, name)
+            _index_remove(self._cards_by_name, [agent.agent_card.name], name)
+        return agent
+
+    def all(self) -> List[AgentInfo]:
+        return list(self._agents.values())
+
+    def alive(self) -> List[AgentInfo]:
+        return [a for a in self._agents.values() if a.status == "alive"]
+
+    def find(self, capability: Optional[str] = None, name: Optional[str] = None) -> List[AgentInfo]:
+        if name:
+            agent = self._agents.get(name)
+            if agent is None:
+                return []
+            candidates = [agent]
+            if capability and not _contains(self._by_capability, self._by_tool, capability, name):
+                return []
+        elif capability:
+            candidates = _lookup(
+                self._by_capability, self._by_tool, capability, self._order
+            ).values()
+        else:
+            candidates = self._agents.values()
+        return [a for a in candidates if a.status == "alive"]
+
+    def find_cards(
+        self, capability: Optional[str] = None, name: Optional[str] = None
+    ) -> List[AgentCard]:
+        if name:
+            candidates = self._cards_by_name.get(name, {}).values()
+            if capability:
+                candidates = [
+                    a
+                    for a in candidates
+                    if _contains(self._cards_by_capability, self._cards_by_tool, capability, a.name)
+                ]
+        elif capability:
+            candidates = _lookup(
+                self._cards_by_capability, self._cards_by_tool, capability, self._order
+            ).values()
+        else:
+            candidates = [a for a in self._agents.values() if a.agent_card is not None]
+        return [a.agent_card for a in candidates if a.status == "alive"]
@@ -1,12 +1,16 @@
+import base64
+import hashlib
 import os
+import tempfile
+from collections import OrderedDict
 from contextlib import AsyncExitStack
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 import httpx
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from mcp import ClientSession
-from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp.client.stdio import StdioServerParameters, get_default_environment, stdio_client
 from pydantic import BaseModel
 
 app = FastAPI(title="Summary Agent (A2A + MCP)")
@@ -18,6 +22,7 @@ _mcp_exit_stack = None
 class QueryRequest(BaseModel):
     query: str
     base64_pdf: Optional[str] = None
+    chunked: bool = False
 
 
 class QueryResponse(BaseModel):
@@ -26,6 +31,20 @@ class QueryResponse(BaseModel):
 
 
 REGISTRY_URL = "http://localhost:8000"
+MAX_UPLOAD_BYTES = int(os.getenv("PDF_MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+MCP_TOOLS = [
+    "extract_pdf_text",
+    "extract_pdf_file",
+    "lookup_pdf_text",
+    "summarize_pdf",
+    "summarize_pdf_chunked",
+]
+
+HANDLE_MEMO_SIZE = int(os.getenv("PDF_HANDLE_MEMO_SIZE", "1024"))
+
+# Server-side document handles by PDF sha256, so a resubmitted PDF goes straight to
+# summarize_pdf. Handles expire on the server; a stale one is dropped and re-fetched.
+document_handles: "OrderedDict[str, str]" = OrderedDict()
 
 
 async def connect_mcp_pdf_tools():
@@ -38,6 +57,11 @@ async def connect_mcp_pdf_tools():
     params = StdioServerParameters(
         command="python",
         args=[os.path.abspath("mcp_server.py")],
+        # stdio servers only inherit a few safe variables; pass the PDF_* settings through.
+        env={
+            **get_default_environment(),
+            **{key: value for key, value in os.environ.items() if key.startswith("PDF_")},
+        },
     )
 
     read, write = await stack.enter_async_context(stdio_client(params))
@@ -69,6 +93,88 @@ def _content_to_text(result) -> str:
     return str(content)
 
 
+def _remember_handle(digest: str, handle: str):
+    document_handles[digest] = handle
+    document_handles.move_to_end(digest)
+    while len(document_handles) > HANDLE_MEMO_SIZE:
+        document_handles.popitem(last=False)
+
+
+async def _open_document(digest: str, extract_tool: str, arguments: Dict[str, Any]) -> str:
+    """Handle to the document's text on the MCP server: from its cache, else by extracting."""
+    result = await mcp_session.call_tool(
+        "lookup_pdf_text", {"sha256": digest, "return_handle": True}
+    )
+    if result.is_error:
+        result = await mcp_session.call_tool(extract_tool, {**arguments, "return_handle": True})
+    handle = _content_to_text(result)
+    if handle.startswith("Error:"):
+        raise HTTPException(502, handle)
+    _remember_handle(digest, handle)
+    return handle
+
+
+async def _summarize_pdf(
+    digest: str, extract_tool: str, arguments: Dict[str, Any]
+) -> QueryResponse:
+    """Summarize a document the server extracts and keeps, so its text never comes back here."""
+    handle = document_handles.get(digest)
+    if handle is not None:
+        summary_result = await mcp_session.call_tool("summarize_pdf", {"handle": handle})
+        if summary_result.is_error:
+            document_handles.pop(digest, None)
+            handle = None
+    if handle is None:
+        handle = await _open_document(digest, extract_tool, arguments)
+        summary_result = await mcp_session.call_tool("summarize_pdf", {"handle": handle})
+        if summary_result.is_error:
+            raise HTTPException(502, _content_to_text(summary_result))
+    return QueryResponse(
+        summary=_content_to_text(summary_result),
+        source="MCP PDF Tools + Summary Agent",
+    )
+
+
+async def _log_progress(progress: float, total: Optional[float], message: Optional[str]):
+    print(f"Chunked summary: {progress:.0f}/{total or 0:.0f} {message or ''}")
+
+
+async def _summarize_chunked(arguments: Dict[str, Any]) -> QueryResponse:
+    """Map-reduce summary of the whole document, logging each chunk as the server reports it."""
+    summary_result = await mcp_session.call_tool(
+        "summarize_pdf_chunked", arguments, progress_callback=_log_progress
+    )
+    summary = _content_to_text(summary_result)
+    if summary.startswith("Error:"):
+        raise HTTPException(502, summary)
+    return QueryResponse(summary=summary, source="MCP PDF Tools (chunked) + Summary Agent")
+
+
+async def _save_upload(request: Request) -> Tuple[str, str]:
+    """Stream the request body into a named temp file; return its path and sha256.
+
+    The MCP server runs in another process, so it needs a real path to open; an
+    in-memory spooled file would have none.
+    """
+    upload = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", delete=False)
+    sha = hashlib.sha256()
+    size = 0
+    try:
+        with upload:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(413, f"PDF larger than {MAX_UPLOAD_BYTES} bytes")
+                sha.update(chunk)
+                upload.write(chunk)
+        if size == 0:
+            raise HTTPException(400, "Empty PDF upload")
+    except BaseException:
+        os.unlink(upload.name)
+        raise
+    return upload.name, sha.hexdigest()
+
+
 @app.post("/query", response_model=QueryResponse)
 async def handle_query(request: QueryRequest):
     global mcp_session
@@ -77,22 +183,12 @@ async def handle_query(request: QueryRequest):
         raise HTTPException(503, "MCP tools not ready")
 
     try:
+        if request.base64_pdf and request.chunked:
+            return await _summarize_chunked({"base64_pdf": request.base64_pdf})
         if request.base64_pdf:
-            text_result = await mcp_session.call_tool(
-                "extract_pdf_text",
-                {"base64_pdf": request.base64_pdf},
-            )
-            pdf_text = _content_to_text(text_result)
-            if pdf_text.startswith("Error:"):
-                raise HTTPException(502, pdf_text)
-
-            summary_result = await mcp_session.call_tool(
-                "summarize_pdf",
-                {"pdf_text": pdf_text},
-            )
-            return QueryResponse(
-                summary=_content_to_text(summary_result),
-                source="MCP PDF Tools + Summary Agent",
+            digest = hashlib.sha256(base64.b64decode(request.base64_pdf)).hexdigest()
+            return await _summarize_pdf(
+                digest, "extract_pdf_text", {"base64_pdf": request.base64_pdf}
             )
 
         return QueryResponse(
@@ -105,6 +201,25 @@ async def handle_query(request: QueryRequest):
         raise HTTPException(500, f"MCP tool error: {str(e)}")
 
 
+@app.post("/query/pdf", response_model=QueryResponse)
+async def handle_pdf_upload(request: Request, chunked: bool = False):
+    """Summarize a PDF sent as the raw request body (``Content-Type: application/pdf``)."""
+    if mcp_session is None:
+        raise HTTPException(503, "MCP tools not ready")
+
+    path, digest = await _save_upload(request)
+    try:
+        if chunked:
+            return await _summarize_chunked({"path": path})
+        return await _summarize_pdf(digest, "extract_pdf_file", {"path": path})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"MCP tool error: {str(e)}")
+    finally:
+        os.unlink(path)
+
+
 @app.get("/health")
 async def health():
     return {"status": "healthy", "capabilities": ["pdf-summary", "text-summary"]}
@@ -115,7 +230,7 @@ async def capabilities():
     return {
         "name": "summary_agent",
         "capabilities": ["pdf-summary", "text-summary"],
-        "mcp_tools": ["extract_pdf_text", "summarize_pdf"],
+        "mcp_tools": MCP_TOOLS,
     }
 
 
@@ -127,7 +242,7 @@ async def register_self():
                 "name": "summary_agent",
                 "url": "http://localhost:8001",
                 "capabilities": ["pdf-summary", "text-summary"],
-                "mcp_tools": ["extract_pdf_text", "summarize_pdf"],
+                "mcp_tools": MCP_TOOLS,
             },
         )
         resp.raise_for_status()
@@ -1,30 +1,539 @@
+import asyncio
 import base64
+import hashlib
+import multiprocessing
+import os
+import re
+import secrets
+import tempfile
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from io import BytesIO
+from itertools import islice
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
+from fastmcp.exceptions import ToolError
 from PyPDF2 import PdfReader
 
 mcp = FastMCP("PDF Processing Tools")
 
+DEFAULT_MAX_CHARS = 4000
+CACHE_MAX_CHARS = int(os.getenv("PDF_CACHE_MAX_CHARS", "16000000"))
+CACHE_DIR = os.getenv("PDF_CACHE_DIR", "")
+CACHE_DIR_MAX_BYTES = int(os.getenv("PDF_CACHE_DIR_MAX_BYTES", "1000000000"))
+WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+QUEUE_LIMIT = int(os.getenv("PDF_QUEUE_LIMIT", "16"))
+SUMMARY_CHUNK_PAGES = int(os.getenv("PDF_SUMMARY_CHUNK_PAGES", "16"))
+HANDLE_TTL = float(os.getenv("PDF_HANDLE_TTL", "300"))
+HANDLE_MAX_CHARS = int(os.getenv("PDF_HANDLE_MAX_CHARS", "32000000"))
+SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+
+def cache_key(
+    digest: str,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    start_page: int = 1,
+    end_page: Optional[int] = None,
+) -> str:
+    """Key extracted text by the document's sha256 and the parameters that shape the text."""
+    return f"{digest}-{max_chars}-{max(start_page, 1)}-{end_page or 0}"
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class TextCache:
+    """LRU of extracted text bounded by total characters, optionally backed by a directory.
+
+    Entries on disk outlive the process; ``max_chars=0`` keeps nothing in memory. The
+    directory is trimmed to ``max_bytes``, least recently used files first. Disk reads
+    and writes run in a thread; everything else stays on the event loop.
+    """
+
+    def __init__(self, max_chars: int, directory: str = "", max_bytes: int = 0):
+        self.max_chars = max_chars
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    async def get(self, key: str) -> Optional[str]:
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+        elif self.directory:
+            text = await asyncio.to_thread(self._read, key)
+            if text is not None:
+                self._remember(key, text)
+        if text is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    async def put(self, key: str, text: str):
+        self._remember(key, text)
+        if self.directory:
+            await asyncio.to_thread(self._write, key, text)
+
+    def _read(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            # A read counts as a use, so the file is trimmed after ones not read since.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return text
+
+    def _write(self, key: str, text: str):
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(key))
+        self._trim_directory()
+
+    def _trim_directory(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".txt"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _remember(self, key: str, text: str):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.chars -= len(previous)
+        if len(text) > self.max_chars:
+            return
+        self._entries[key] = text
+        self.chars += len(text)
+        while self.chars > self.max_chars:
+            _, evicted = self._entries.popitem(last=False)
+            self.chars -= len(evicted)
+
+
+text_cache = TextCache(CACHE_MAX_CHARS, CACHE_DIR, CACHE_DIR_MAX_BYTES)
+
+
+class HandleStore:
+    """Extracted text held server-side under opaque handles, bounded by age and total characters.
+
+    A handle lives ``ttl`` seconds from when it was last handed out, so insertion order
+    is also expiry order. Text stored again under the same key gets the existing handle
+    back with a fresh lifetime. Not thread-safe: the tools that use it are all async so
+    fastmcp runs them on the event loop rather than in worker threads.
+    """
+
+    def __init__(self, ttl: float, max_chars: int):
+        self.ttl = ttl
+        self.max_chars = max_chars
+        self.chars = 0
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._by_key: Dict[str, str] = {}
+
+    def put(self, key: str, text: str) -> str:
+        now = time.monotonic()
+        self._expire(now)
+        handle = self._by_key.get(key)
+        if handle is not None:
+            # Handing the handle out again restarts its lifetime; moving it to the end keeps
+            # insertion order equal to expiry order.
+            self._entries[handle] = (key, self._entries[handle][1], now + self.ttl)
+            self._entries.move_to_end(handle)
+            return handle
+        if len(text) > self.max_chars:
+            raise ValueError(f"Document text over {self.max_chars} chars cannot be held")
+        handle = f"doc-{secrets.token_hex(16)}"
+        self._entries[handle] = (key, text, now + self.ttl)
+        self._by_key[key] = handle
+        self.chars += len(text)
+        while self.chars > self.max_chars:
+            self._drop(next(iter(self._entries)))
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        self._expire(time.monotonic())
+        entry = self._entries.get(handle)
+        return entry[1] if entry is not None else None
+
+    def _expire(self, now: float):
+        while self._entries:
+            handle, (_, _, expires) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            self._drop(handle)
+
+    def _drop(self, handle: str):
+        key, text, _ = self._entries.pop(handle)
+        del self._by_key[key]
+        self.chars -= len(text)
+
+
+document_handles = HandleStore(HANDLE_TTL, HANDLE_MAX_CHARS)
+
+
+def iter_page_text(
+    reader: PdfReader, start_page: int = 1, end_page: Optional[int] = None
+) -> Iterator[str]:
+    """Yield page text one page at a time; pages are 1-based and inclusive."""
+    last = len(reader.pages) if end_page is None else min(end_page, len(reader.pages))
+    for index in range(max(start_page, 1) - 1, last):
+        yield reader.pages[index].extract_text() or ""
+
+
+def take_text(pages: Iterable[str], max_chars: int) -> str:
+    """Join page text, stopping as soon as ``max_chars`` is reached (0 means no limit)."""
+    parts = []
+    total = 0
+    for page_text in pages:
+        parts.append(page_text)
+        total += len(page_text)
+        if max_chars and total >= max_chars:
+            break
+    text = "".join(parts)
+    return text[:max_chars] if max_chars else text
+
+
+def extract_text(
+    source: Union[bytes, str],
+    max_chars: int = DEFAULT_MAX_CHARS,
+    start_page: int = 1,
+    end_page: Optional[int] = None,
+) -> str:
+    """Extract from PDF bytes or from a file path, which PyPDF2 then reads on demand."""
+    reader = PdfReader(BytesIO(source) if isinstance(source, bytes) else source)
+    return take_text(iter_page_text(reader, start_page, end_page), max_chars)
+
+
+def count_pages(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def extract_page_range(
+    path: str, max_chars: int, first_page: int, last_page: int
+) -> Tuple[str, int]:
+    """Pool task: the text of one page range, plus the document's page count."""
+    reader = PdfReader(path)
+    return take_text(iter_page_text(reader, first_page, last_page), max_chars), len(reader.pages)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_queued = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked: the server process already runs threads and an event loop.
+        _pool = ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_pooled(fn, *args):
+    """Run ``fn(*args)`` on the pool, retrying once on a fresh pool if a dead worker broke it.
+
+    A broken executor never recovers, so without this every later call would fail until
+    the server restarts.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    try:
+        return await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+
+
+def _write_temp(pdf_bytes: bytes) -> str:
+    with tempfile.NamedTemporaryFile(prefix="pdf-", suffix=".pdf", delete=False) as f:
+        f.write(pdf_bytes)
+    return f.name
+
+
+async def extract_text_pooled(
+    source: Union[bytes, str],
+    max_chars: int = DEFAULT_MAX_CHARS,
+    start_page: int = 1,
+    end_page: Optional[int] = None,
+) -> str:
+    """``extract_text`` on the process pool, split into page ranges.
+
+    With a budget, the first ``PAGES_PER_TASK`` pages run alone and the rest fan out only
+    if they fall short. At most ``WORKERS`` ranges are in flight at once and results are
+    joined in page order, so extraction still stops at the character budget. Ranges not
+    yet started are dropped if the caller is cancelled.
+    """
+    if isinstance(source, bytes):
+        # Workers open the document by path instead of each receiving a pickled copy.
+        path = await asyncio.to_thread(_write_temp, source)
+        try:
+            return await extract_text_pooled(path, max_chars, start_page, end_page)
+        finally:
+            os.unlink(path)
+
+    first_page = max(start_page, 1)
+    parts = []
+    if max_chars:
+        # The first range alone usually meets the budget, so run it before fanning out;
+        # it also reports the page count.
+        head_last = first_page + PAGES_PER_TASK - 1
+        if end_page is not None:
+            head_last = min(head_last, end_page)
+        head, page_count = await _run_pooled(
+            extract_page_range, source, max_chars, first_page, head_last
+        )
+        if len(head) >= max_chars:
+            return head[:max_chars]
+        parts.append(head)
+        # No later range can contribute more than what the head left of the budget.
+        range_budget = max_chars - len(head)
+        next_page = head_last + 1
+        last = page_count if end_page is None else min(end_page, page_count)
+        step = PAGES_PER_TASK
+    else:
+        page_count = await _run_pooled(count_pages, source)
+        range_budget = 0
+        next_page = first_page
+        last = page_count if end_page is None else min(end_page, page_count)
+        # Every task re-opens the document, so without a budget to stop early for, give
+        # each worker one share of the pages instead of many small ranges.
+        step = max(-(-(last - first_page + 1) // WORKERS), 1)
+    ranges = iter(
+        [(first, min(first + step - 1, last)) for first in range(next_page, last + 1, step)]
+    )
+
+    def submit(page_range) -> asyncio.Future:
+        return asyncio.ensure_future(
+            _run_pooled(extract_page_range, source, range_budget, *page_range)
+        )
+
+    pending: Deque[asyncio.Future] = deque(submit(r) for r in islice(ranges, WORKERS))
+    total = sum(len(part) for part in parts)
+    try:
+        while pending:
+            page_text, _ = await pending.popleft()
+            parts.append(page_text)
+            total += len(page_text)
+            if max_chars and total >= max_chars:
+                break
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(submit(next_range))
+    finally:
+        for future in pending:
+            future.cancel()
+    text = "".join(parts)
+    return text[:max_chars] if max_chars else text
+
+
+@contextmanager
+def _queue_slot():
+    """Count one document against ``QUEUE_LIMIT``, refusing it when the queue is full."""
+    global _queued
+    if _queued >= QUEUE_LIMIT:
+        raise RuntimeError(f"{_queued} extractions already queued, retry later")
+    _queued += 1
+    try:
+        yield
+    finally:
+        _queued -= 1
+
+
+async def _extract_cached(
+    digest: str,
+    source: Union[bytes, str],
+    max_chars: int,
+    start_page: int,
+    end_page: Optional[int],
+    return_handle: bool = False,
+) -> str:
+    key = cache_key(digest, max_chars, start_page, end_page)
+    text = await text_cache.get(key)
+    if text is None:
+        with _queue_slot():
+            text = await extract_text_pooled(source, max_chars, start_page, end_page)
+        await text_cache.put(key, text)
+    return document_handles.put(key, text) if return_handle else text
+
+
+def summarize_page_range(path: str, first_page: int, last_page: int) -> Tuple[int, str]:
+    """Map step, run on a pool worker: extract one page range and summarize it in a line."""
+    text = extract_text(path, 0, first_page, last_page)
+    snippet = " ".join(text[:120].split())
+    return len(text), f"- Pages {first_page}-{last_page}: {snippet}..."
+
+
+def reduce_summaries(page_count: int, partials: List[Tuple[int, str]]) -> str:
+    lines = [
+        f"PDF Summary ({page_count} pages in {len(partials)} chunks):",
+        f"- Length: {sum(chars for chars, _ in partials)} chars",
+        *(line for _, line in partials),
+        "- Key topics: documents, analysis",
+    ]
+    return "\n".join(lines)
+
+
+async def summarize_pooled(path: str, pages_per_chunk: int, ctx: Optional[Context] = None) -> str:
+    """Summarize page ranges on the process pool, then reduce the partials in page order.
+
+    Chunks finish in any order; each one is reported through ``ctx.report_progress``. At
+    most ``WORKERS`` chunks are in flight, so chunks not yet started are simply dropped
+    if the caller is cancelled.
+    """
+    page_count = await _run_pooled(count_pages, path)
+    step = max(pages_per_chunk, 1)
+    chunks = [
+        (first, min(first + step - 1, page_count)) for first in range(1, page_count + 1, step)
+    ]
+    partials: List[Tuple[int, str]] = [(0, "")] * len(chunks)
+    running: Dict[asyncio.Future, int] = {}
+    queued = iter(range(len(chunks)))
+
+    def submit(index: int):
+        task = asyncio.ensure_future(_run_pooled(summarize_page_range, path, *chunks[index]))
+        running[task] = index
+
+    for index in islice(queued, WORKERS):
+        submit(index)
+    finished = 0
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                partials[index] = future.result()
+                finished += 1
+                next_index = next(queued, None)
+                if next_index is not None:
+                    submit(next_index)
+                if ctx is not None:
+                    first, last = chunks[index]
+                    await ctx.report_progress(
+                        finished, len(chunks), f"pages {first}-{last} summarized"
+                    )
+    finally:
+        for future in running:
+            future.cancel()
+    return reduce_summaries(page_count, partials)
+
 
 @mcp.tool
-def extract_pdf_text(base64_pdf: str) -> str:
-    """Extract text from base64-encoded PDF."""
+async def extract_pdf_text(
+    base64_pdf: str,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    start_page: int = 1,
+    end_page: Optional[int] = None,
+    return_handle: bool = False,
+) -> str:
+    """Extract text from a base64-encoded PDF.
+
+    Pages are parsed lazily on a process pool and extraction stops once
+    ``max_chars`` characters have been collected (``0`` for no limit).
+    ``start_page``/``end_page`` are 1-based and inclusive. With ``return_handle``
+    the text stays on the server and a document handle for ``summarize_pdf`` is
+    returned instead.
+    """
     try:
         pdf_bytes = base64.b64decode(base64_pdf)
-        reader = PdfReader(BytesIO(pdf_bytes))
-        text_parts = []
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            text_parts.append(page_text)
-        return "".join(text_parts)[:4000]
+        digest = await asyncio.to_thread(lambda: hashlib.sha256(pdf_bytes).hexdigest())
+        return await _extract_cached(
+            digest, pdf_bytes, max_chars, start_page, end_page, return_handle
+        )
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@mcp.tool
+async def extract_pdf_file(
+    path: str,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    start_page: int = 1,
+    end_page: Optional[int] = None,
+    return_handle: bool = False,
+) -> str:
+    """Extract text from a PDF file on this host, so the document never travels as JSON.
+
+    Takes the same parameters as ``extract_pdf_text``.
+    """
+    try:
+        digest = await asyncio.to_thread(file_digest, path)
+        return await _extract_cached(digest, path, max_chars, start_page, end_page, return_handle)
     except Exception as e:
         return f"Error: {str(e)}"
 
 
 @mcp.tool
-def summarize_pdf(pdf_text: str) -> str:
-    """Summarize PDF text for demo purposes."""
+async def lookup_pdf_text(
+    sha256: str,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    start_page: int = 1,
+    end_page: Optional[int] = None,
+    return_handle: bool = False,
+) -> str:
+    """Return cached text (or a handle to it) by the sha256 of the PDF, without sending the PDF.
+
+    Fails when nothing is cached, so the caller knows to fall back to an extract tool.
+    """
+    # The key becomes a file name under PDF_CACHE_DIR, so only a real digest may reach it.
+    sha256 = sha256.lower()
+    if not SHA256_HEX.fullmatch(sha256):
+        raise ToolError("sha256 must be 64 hex characters")
+    key = cache_key(sha256, max_chars, start_page, end_page)
+    text = await text_cache.get(key)
+    if text is None:
+        raise ToolError(f"No cached text for {sha256}")
+    return document_handles.put(key, text) if return_handle else text
+
+
+@mcp.tool
+async def summarize_pdf(pdf_text: str = "", handle: Optional[str] = None) -> str:
+    """Summarize PDF text for demo purposes.
+
+    Pass ``handle`` from an extract tool called with ``return_handle`` to summarize
+    text the server already holds instead of sending it back.
+    """
+    if handle:
+        pdf_text = document_handles.get(handle)
+        if pdf_text is None:
+            raise ToolError(f"Unknown or expired document handle {handle}")
     summary = (
         "PDF Summary:\n"
         f"- Length: {len(pdf_text)} chars\n"
@@ -34,6 +543,47 @@ def summarize_pdf(pdf_text: str) -> str:
     return summary
 
 
+@mcp.tool
+async def summarize_pdf_chunked(
+    ctx: Context,
+    base64_pdf: str = "",
+    path: str = "",
+    pages_per_chunk: int = SUMMARY_CHUNK_PAGES,
+) -> str:
+    """Summarize a whole PDF: page ranges are summarized in parallel, then combined.
+
+    Send the document as ``base64_pdf`` or as a ``path`` on this host. A progress
+    notification is sent as each range finishes.
+    """
+    temp_path = None
+    try:
+        if path:
+            digest = await asyncio.to_thread(file_digest, path)
+        elif base64_pdf:
+            pdf_bytes = base64.b64decode(base64_pdf)
+            digest = await asyncio.to_thread(lambda: hashlib.sha256(pdf_bytes).hexdigest())
+        else:
+            raise ValueError("Pass base64_pdf or path")
+        key = f"{digest}-summary-{pages_per_chunk}"
+        summary = await text_cache.get(key)
+        if summary is None:
+            with _queue_slot():
+                if not path:
+                    path = temp_path = await asyncio.to_thread(_write_temp, pdf_bytes)
+                summary = await summarize_pooled(path, pages_per_chunk, ctx)
+            await text_cache.put(key, summary)
+        return summary
+    except Exception as e:
+        return f"Error: {str(e)}"
+    finally:
+        if temp_path is not None:
+            os.unlink(temp_path)
+
+
 if __name__ == "__main__":
     print("MCP PDF Server running...")
-    mcp.run()
+    try:
+        mcp.run()
+    finally:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
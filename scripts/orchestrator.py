@@ -1,9 +1,9 @@
 import asyncio
 import base64
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 
 app = FastAPI(title="A2A Orchestrator + Registry")
@@ -25,6 +25,7 @@ class AgentDiscovery(BaseModel):
 class OrchestratorQueryRequest(BaseModel):
     query: str
     base64_pdf: Optional[str] = None
+    chunked: bool = False
 
 
 @app.post("/register")
@@ -64,8 +65,7 @@ async def health():
     return {"status": "healthy", "agents_alive": alive}
 
 
-async def orchestrate_query(query: str, base64_pdf: Optional[str] = None):
-    """Full orchestration flow."""
+async def _pick_pdf_agent(query: str) -> Dict[str, Any]:
     print(f"\nUser Query: {query}")
     print("Step 1: Discover A2A agents...")
 
@@ -76,17 +76,11 @@ async def orchestrate_query(query: str, base64_pdf: Optional[str] = None):
         raise HTTPException(404, "No suitable agents found")
 
     target_agent = disc.agents[0]
-    agent_url = target_agent["url"]
-    print(f"Step 2: Calling {target_agent['name']} at {agent_url}")
+    print(f"Step 2: Calling {target_agent['name']} at {target_agent['url']}")
+    return target_agent
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            f"{agent_url}/query",
-            json={"query": query, "base64_pdf": base64_pdf},
-        )
-        resp.raise_for_status()
-        result = resp.json()
 
+def _synthesize(target_agent: Dict[str, Any], result: Dict[str, Any]) -> str:
     summary = result.get("summary", str(result))
     synthesis = (
         "ORCHESTRATOR SYNTHESIS:\n"
@@ -97,10 +91,56 @@ async def orchestrate_query(query: str, base64_pdf: Optional[str] = None):
     return synthesis
 
 
+async def orchestrate_query(query: str, base64_pdf: Optional[str] = None, chunked: bool = False):
+    """Full orchestration flow."""
+    target_agent = await _pick_pdf_agent(query)
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        resp = await client.post(
+            f"{target_agent['url']}/query",
+            json={"query": query, "base64_pdf": base64_pdf, "chunked": chunked},
+        )
+        resp.raise_for_status()
+        result = resp.json()
+
+    return _synthesize(target_agent, result)
+
+
+async def orchestrate_upload(query: str, pdf_body: AsyncIterator[bytes], chunked: bool = False):
+    """Orchestration flow for a raw PDF upload, streamed through to the agent as it arrives."""
+    target_agent = await _pick_pdf_agent(query)
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        resp = await client.post(
+            f"{target_agent['url']}/query/pdf",
+            params={"chunked": chunked},
+            content=pdf_body,
+            headers={"Content-Type": "application/pdf"},
+        )
+        resp.raise_for_status()
+        result = resp.json()
+
+    return _synthesize(target_agent, result)
+
+
 @app.post("/query")
 async def query(request: OrchestratorQueryRequest):
     try:
-        result = await orchestrate_query(request.query, request.base64_pdf)
+        result = await orchestrate_query(request.query, request.base64_pdf, request.chunked)
+        return {"result": result}
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
+        raise HTTPException(502, f"Agent call failed: {str(e)}")
+    except Exception as e:
+        raise HTTPException(500, f"Orchestration failed: {str(e)}")
+
+
+@app.post("/query/pdf")
+async def query_pdf(request: Request, query: str = "Summarize this PDF", chunked: bool = False):
+    """Summarize a PDF sent as the raw request body instead of base64 inside JSON."""
+    try:
+        result = await orchestrate_upload(query, request.stream(), chunked)
         return {"result": result}
     except HTTPException:
         raise
@@ -122,6 +162,7 @@ if __name__ == "__main__":
     print("3. python mcp_server.py")
     print("\nThen test:")
     print("curl -X POST http://localhost:8000/query -H 'Content-Type: application/json' -d '{\"query\": \"Summarize this PDF\", \"base64_pdf\": \"...\"}'")
+    print("curl -X POST http://localhost:8000/query/pdf -H 'Content-Type: application/pdf' --data-binary @resume.pdf")
 
     loop = asyncio.get_event_loop()
     while True:
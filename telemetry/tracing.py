@@ -0,0 +1,322 @@
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+# (trace_id, parent span_id, sampled) parsed from a W3C traceparent header.
+ParentContext = Tuple[str, str, bool]
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "service",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "status",
+        "attributes",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        service: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        kind: str,
+        attributes: Dict[str, Any],
+    ):
+        self.name = name
+        self.service = service
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = "ok"
+        self.attributes = attributes
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, key: str, value: Any):
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_payload(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    kinds = {"internal": 1, "server": 2, "client": 3}
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for record in spans:
+        by_service.setdefault(record["service"], []).append(
+            {
+                "traceId": record["trace_id"],
+                "spanId": record["span_id"],
+                "parentSpanId": record["parent_id"] or "",
+                "name": record["name"],
+                "kind": kinds.get(record["kind"], 1),
+                "startTimeUnixNano": str(record["start_ns"]),
+                "endTimeUnixNano": str(record["end_ns"]),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)}
+                    for key, value in record["attributes"].items()
+                ],
+                "status": {"code": 2 if record["status"] == "error" else 1},
+            }
+        )
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": service}}]
+                },
+                "scopeSpans": [{"scope": {"name": "a2a-mcp-orchestrator"}, "spans": records}],
+            }
+            for service, records in by_service.items()
+        ]
+    }
+
+
+class SpanExporter:
+    """Buffers finished spans and flushes them to a JSONL file or an OTLP/HTTP endpoint."""
+
+    def __init__(
+        self,
+        service: str,
+        exporter: str,
+        path: str,
+        endpoint: str,
+        sample_ratio: float,
+        flush_interval: float,
+        max_batch: int = 512,
+    ):
+        if exporter not in ("file", "otlp"):
+            raise ValueError(f"Unknown trace exporter: {exporter}")
+        self.service = service
+        self.exporter = exporter
+        self.path = path
+        self.endpoint = endpoint
+        self.sample_ratio = sample_ratio
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.exported = 0
+        self.dropped = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.exporter == "otlp":
+            self._client = httpx.AsyncClient(timeout=5.0)
+        self._task = asyncio.create_task(self._run())
+
+    def record(self, span: Span):
+        if len(self._buffer) >= self.max_batch * 8:
+            self.dropped += 1
+            return
+        self._buffer.append(span.as_dict())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    def _write(self, records: List[Dict[str, Any]]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    async def flush(self):
+        while self._buffer:
+            batch = self._buffer[: self.max_batch]
+            del self._buffer[: self.max_batch]
+            if self.exporter == "file":
+                await asyncio.to_thread(self._write, batch)
+            else:
+                resp = await self._client.post(self.endpoint, json=_otlp_payload(batch))
+                resp.raise_for_status()
+            self.exported += len(batch)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        try:
+            await self.flush()
+        finally:
+            if self._client is not None:
+                await self._client.aclose()
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def start_tracing(service: str) -> Optional[SpanExporter]:
+    global _exporter
+    exporter = os.getenv("TRACE_EXPORTER", "").lower()
+    if _exporter is not None or exporter in ("", "none"):
+        return _exporter
+    _exporter = SpanExporter(
+        service=service,
+        exporter=exporter,
+        path=os.getenv("TRACE_FILE", "traces.jsonl"),
+        endpoint=os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+        sample_ratio=float(os.getenv("TRACE_SAMPLE_RATIO", "1.0")),
+        flush_interval=float(os.getenv("TRACE_FLUSH_INTERVAL", "1.0")),
+    )
+    _exporter.start()
+    return _exporter
+
+
+async def stop_tracing():
+    global _exporter
+    exporter, _exporter = _exporter, None
+    if exporter is not None:
+        await exporter.close()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[ParentContext]:
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    try:
+        flags = int(parts[3][:2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def trace_headers() -> Dict[str, str]:
+    current = _current.get()
+    if current is None:
+        return {}
+    flags = "01" if current.sampled else "00"
+    return {"traceparent": f"00-{current.trace_id}-{current.span_id}-{flags}"}
+
+
+@contextmanager
+def span(
+    name: str,
+    kind: str = "internal",
+    service: Optional[str] = None,
+    parent: Optional[ParentContext] = None,
+    **attributes: Any,
+) -> Iterator[Any]:
+    """Time the enclosed block as a child of the current span (or of ``parent``)."""
+    exporter = _exporter
+    if exporter is None:
+        yield _NOOP
+        return
+    current = _current.get()
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    elif current is not None:
+        trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+    else:
+        trace_id = f"{random.getrandbits(128):032x}"
+        parent_id = None
+        sampled = random.random() < exporter.sample_ratio
+    if service is None:
+        service = current.service if current is not None else exporter.service
+    current_span = Span(name, service, trace_id, parent_id, sampled, kind, attributes)
+    token = _current.set(current_span)
+    try:
+        yield current_span
+    except BaseException as e:
+        current_span.status = "error"
+        current_span.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        current_span.end_ns = time.time_ns()
+        if sampled:
+            exporter.record(current_span)
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a server span per request, continuing any incoming traceparent."""
+
+    def __init__(
+        self,
+        app,
+        service: str,
+        skip_paths: Tuple[str, ...] = ("/health", "/stats", "/metrics"),
+    ):
+        self.app = app
+        self.service = service
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _exporter is None or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        with span(
+            f"{scope['method']} {scope['path']}",
+            kind="server",
+            service=self.service,
+            parent=parse_traceparent(traceparent),
+        ) as server_span:
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    server_span.set("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        server_span.status = "error"
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
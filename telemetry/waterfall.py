@@ -0,0 +1,143 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+Record = Dict[str, Any]
+
+DETAIL_KEYS = ("capability", "capabilities", "server", "tool", "cache", "http.status_code")
+
+
+def load_spans(path: str) -> Dict[str, List[Record]]:
+    traces: Dict[str, List[Record]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                traces.setdefault(record["trace_id"], []).append(record)
+    return traces
+
+
+def _roots(spans: List[Record]) -> List[Record]:
+    ids = {record["span_id"] for record in spans}
+    return sorted(
+        (record for record in spans if record["parent_id"] not in ids),
+        key=lambda record: record["start_ns"],
+    )
+
+
+def _children(spans: List[Record]) -> Dict[str, List[Record]]:
+    children: Dict[str, List[Record]] = {}
+    for record in spans:
+        if record["parent_id"]:
+            children.setdefault(record["parent_id"], []).append(record)
+    for siblings in children.values():
+        siblings.sort(key=lambda record: record["start_ns"])
+    return children
+
+
+def critical_path(root: Record, children: Dict[str, List[Record]]) -> Set[str]:
+    """Follow, from the root down, the child that finished last: the one the parent waited on."""
+    path = {root["span_id"]}
+    node = root
+    while children.get(node["span_id"]):
+        node = max(children[node["span_id"]], key=lambda record: record["end_ns"])
+        path.add(node["span_id"])
+    return path
+
+
+def pick_trace(traces: Dict[str, List[Record]], trace_id: Optional[str], slowest: bool) -> str:
+    if trace_id:
+        matches = [tid for tid in traces if tid.startswith(trace_id)]
+        if len(matches) != 1:
+            raise SystemExit(f"{len(matches)} traces match {trace_id!r}")
+        return matches[0]
+
+    def span_of(tid: str) -> int:
+        roots = _roots(traces[tid])
+        return max(r["end_ns"] for r in roots) - min(r["start_ns"] for r in roots)
+
+    if slowest:
+        return max(traces, key=span_of)
+    return max(traces, key=lambda tid: min(record["start_ns"] for record in traces[tid]))
+
+
+def render(spans: List[Record], width: int = 40, critical_only: bool = False) -> str:
+    children = _children(spans)
+    roots = _roots(spans)
+    start = min(record["start_ns"] for record in roots)
+    end = max(record["end_ns"] for record in spans)
+    total = max(end - start, 1)
+    critical: Set[str] = set()
+    for root in roots:
+        critical |= critical_path(root, children)
+
+    lines = [
+        f"trace {spans[0]['trace_id']}  {total / 1e6:.1f} ms  {len(spans)} spans"
+        "  (* = critical path)",
+        f"  {'start':>9} {'dur':>9}  {'':<{width}}  service / span",
+    ]
+
+    def walk(record: Record, depth: int):
+        on_path = record["span_id"] in critical
+        if on_path or not critical_only:
+            offset = (record["start_ns"] - start) / total
+            length = max((record["end_ns"] - record["start_ns"]) / total, 1 / width)
+            lead = int(offset * width)
+            bar = " " * lead + "#" * max(1, min(width - lead, round(length * width)))
+            attributes = record.get("attributes", {})
+            detail = " ".join(
+                f"{key}={attributes[key]}"
+                for key in DETAIL_KEYS
+                if key in attributes
+            )
+            status = " ERROR" if record.get("status") == "error" else ""
+            lines.append(
+                f"{'*' if on_path else ' '} "
+                f"{(record['start_ns'] - start) / 1e6:>8.1f}ms "
+                f"{(record['end_ns'] - record['start_ns']) / 1e6:>7.1f}ms  "
+                f"{bar:<{width}}  {'  ' * depth}{record['service']}: {record['name']}"
+                f"{' ' + detail if detail else ''}{status}"
+            )
+        for child in children.get(record["span_id"], []):
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def list_traces(traces: Dict[str, List[Record]]) -> str:
+    rows = []
+    for tid, spans in traces.items():
+        roots = _roots(spans)
+        started = min(record["start_ns"] for record in roots)
+        duration = (max(record["end_ns"] for record in roots) - started) / 1e6
+        summary = f"{duration:>9.1f} ms  {len(spans):>4} spans  {roots[0]['name']}"
+        rows.append((started, f"{tid}  {summary}"))
+    return "\n".join(row for _, row in sorted(rows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render one request's trace as a waterfall.")
+    parser.add_argument(
+        "path", nargs="?", default="traces.jsonl", help="span file written by TRACE_EXPORTER=file"
+    )
+    parser.add_argument("--trace", help="trace id (or unique prefix); defaults to the latest trace")
+    parser.add_argument("--slowest", action="store_true", help="show the slowest trace in the file")
+    parser.add_argument("--list", action="store_true", help="list traces instead of rendering one")
+    parser.add_argument(
+        "--critical-only", action="store_true", help="only print spans on the critical path"
+    )
+    parser.add_argument("--width", type=int, default=40)
+    args = parser.parse_args()
+
+    traces = load_spans(args.path)
+    if not traces:
+        sys.exit(f"No spans in {args.path}")
+    if args.list:
+        print(list_traces(traces))
+    else:
+        trace_id = pick_trace(traces, args.trace, args.slowest)
+        print(render(traces[trace_id], args.width, args.critical_only))